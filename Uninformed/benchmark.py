@@ -0,0 +1,494 @@
+"""
+Benchmarks for the search engine.
+
+Each benchmark builds its own problems, times the searches and prints a table
+with print_table. Run this file as a script to run all of them:
+
+    python benchmark.py
+"""
+
+import gc
+import itertools
+import shutil
+import time
+import tracemalloc
+
+from contraction import *
+from engine import *
+
+
+def timed(fn, *args, **kwds):
+    """Call fn(*args, **kwds); return its result and the wall time in seconds."""
+    start = time.perf_counter()
+    result = fn(*args, **kwds)
+    return result, time.perf_counter() - start
+
+
+def road_graph(n, min_links=4, seed=0, first=0):
+    """A RandomGraph of the n cities first, first + 1, ..., laid out on a
+    square whose side grows as sqrt(n), so that every benchmark's graphs
+    have the same density of cities whatever their size."""
+    side = 10 * int(np.sqrt(n))
+    return RandomGraph(list(range(first, first + n)), min_links, side, side, seed=seed)
+
+
+# ______________________________________________________________________________
+# Frontier membership
+
+
+def deque_breadth_first_graph_search(problem):
+    """The notebook's breadth_first_graph_search, whose frontier is a plain
+    deque; kept here only as the baseline for benchmark_bfs_frontier."""
+    node = Node(problem.initial)
+    if problem.goal_test(node.state):
+        return node
+    frontier = deque([node])
+    explored = set()
+    while frontier:
+        node = frontier.popleft()
+        explored.add(node.state)
+        for child in node.expand(problem):
+            if child.state not in explored and child not in frontier:
+                if problem.goal_test(child.state):
+                    return child
+                frontier.append(child)
+    return None
+
+
+def benchmark_bfs_frontier(sizes=(500, 1000, 2000), min_links=4, seed=0):
+    """Exhaust breadth-first graph search on RandomGraphs of growing size,
+    with a deque frontier and with an IndexedQueue frontier. The goal is
+    unreachable, so every reachable node is expanded; time per node should
+    stay flat for IndexedQueue and grow with the frontier for the deque."""
+    rows = []
+    for n in sizes:
+        problem = GraphProblem(0, None, road_graph(n, min_links, seed))
+        _, t_deque = timed(deque_breadth_first_graph_search, problem)
+        _, t_indexed = timed(breadth_first_graph_search, problem)
+        rows.append([n, t_deque, t_indexed, 1e6 * t_deque / n, 1e6 * t_indexed / n])
+    print_table(rows, header=['nodes', 'deque s', 'indexed s', 'deque us/node', 'indexed us/node'],
+                numfmt='{:.4g}')
+
+
+# ______________________________________________________________________________
+# Bidirectional search
+
+
+def benchmark_bidirectional(n=2000, queries=50, min_links=4, seed=0):
+    """Time random point-to-point queries on one RandomGraph with the
+    unidirectional and bidirectional versions of BFS and UCS."""
+    random.seed(seed)
+    graph = road_graph(n, min_links, seed)
+    problems = [GraphProblem(random.randrange(n), random.randrange(n), graph) for _ in range(queries)]
+    rows = []
+    for searcher in (breadth_first_graph_search, bidirectional_breadth_first_search,
+                     uniform_cost_search, bidirectional_uniform_cost_search):
+        _, t = timed(lambda: [searcher(problem) for problem in problems])
+        rows.append([searcher.__name__, 1e3 * t / queries])
+    print_table(rows, header=['searcher', 'ms/query'], numfmt='{:.3f}')
+
+
+# ______________________________________________________________________________
+# Node size and throughput
+
+
+class DictNode:
+    """search.Node as it was before it had __slots__, with a __dict__, a
+    stored depth and a hash recomputed on every call; the baseline for
+    benchmark_node."""
+
+    def __init__(self, state, parent=None, action=None, path_cost=0):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.path_cost = path_cost
+        self.depth = 0
+        if parent:
+            self.depth = parent.depth + 1
+
+    def __eq__(self, other):
+        return isinstance(other, DictNode) and self.state == other.state
+
+    def __hash__(self):
+        return hash(self.state)
+
+
+def build_tree(node_class, states):
+    """Make a binary search tree with one node per state, and put the nodes
+    in a set the way explored sets and frontier indexes do."""
+    nodes = [node_class(states[0])]
+    for i in range(1, len(states)):
+        parent = nodes[(i - 1) // 2]
+        nodes.append(node_class(states[i], parent, states[i], parent.path_cost + 1))
+    return nodes, set(nodes)
+
+
+def benchmark_node(n=200000):
+    """Report the bytes allocated per node and the nodes built (and hashed
+    into a set) per second, for DictNode and for search.Node. States are
+    tuples, whose hash is not cached by Python. Bytes per node include the
+    tree's list and set slots and, for Node, the cached hash."""
+    states = [(i, -i) for i in range(n)]
+    rows = []
+    for node_class in (DictNode, Node):
+        tracemalloc.start()
+        nodes = build_tree(node_class, states)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del nodes
+        gc.disable()  # as timeit does; collections of the growing tree swamp the timings
+        _, t = timed(build_tree, node_class, states)
+        gc.enable()
+        rows.append([node_class.__name__, size / n, n / t])
+    print_table(rows, header=['node class', 'bytes/node', 'nodes/s'], numfmt='{:.0f}')
+
+
+# ______________________________________________________________________________
+# Array-backed search trees
+
+
+class GridProblem(Problem):
+    """Walk between the cells of a size x size grid; an implicit state space
+    in which each state is an (x, y) tuple made by result()."""
+
+    moves = dict(N=(0, 1), S=(0, -1), E=(1, 0), W=(-1, 0))
+
+    def __init__(self, size, goal=None):
+        super().__init__((0, 0), goal)
+        self.size = size
+
+    def actions(self, state):
+        x, y = state
+        return [a for a, (dx, dy) in self.moves.items()
+                if 0 <= x + dx < self.size and 0 <= y + dy < self.size]
+
+    def result(self, state, action):
+        dx, dy = self.moves[action]
+        return state[0] + dx, state[1] + dy
+
+
+def benchmark_search_tree(size=300):
+    """Exhaust a GridProblem with breadth_first_graph_search and with
+    breadth_first_array_search; report peak bytes allocated per generated
+    node (states included) and wall time."""
+    n = size * size
+    rows = []
+    for searcher in (breadth_first_graph_search, breadth_first_array_search):
+        tracemalloc.start()
+        searcher(GridProblem(size))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        _, t = timed(searcher, GridProblem(size))
+        rows.append([searcher.__name__, peak / n, t])
+    print_table(rows, header=['searcher', 'peak bytes/node', 'seconds'], numfmt='{:.3g}')
+
+
+# ______________________________________________________________________________
+# Compiled graphs
+
+
+def benchmark_compiled_graph(n=2000, queries=50, min_links=4, seed=0):
+    """Time uniform_cost_search on random queries over a RandomGraph, as
+    GraphProblems and as CompiledGraphProblems."""
+    random.seed(seed)
+    graph = road_graph(n, min_links, seed)
+    compiled, t_compile = timed(graph.compile)
+    pairs = [(random.randrange(n), random.randrange(n)) for _ in range(queries)]
+    rows = [['compile', 1e3 * t_compile]]
+    for name, make in (('GraphProblem', lambda a, b: GraphProblem(a, b, graph)),
+                       ('CompiledGraphProblem', lambda a, b: CompiledGraphProblem(a, b, compiled))):
+        problems = [make(a, b) for a, b in pairs]
+        _, t = timed(lambda: [uniform_cost_search(problem) for problem in problems])
+        rows.append([name, 1e3 * t / queries])
+    print_table(rows, header=['', 'ms/query'], numfmt='{:.3f}')
+
+
+def benchmark_load_compiled(n=10 ** 5, min_links=2, seed=0, path='benchmark.graph'):
+    """Save a compiled RandomGraph, then time CompiledGraph.load, the first
+    CompiledGraphProblem on the loaded graph (which makes the lists of
+    as_lists) and a second one; report the bytes the lists take per edge."""
+    graph = road_graph(n, min_links, seed)
+    graph.save(path)
+    loaded, t_load = timed(CompiledGraph.load, path)
+    tracemalloc.start()
+    _, t_first = timed(CompiledGraphProblem, 0, 1, loaded)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    _, t_second = timed(CompiledGraphProblem, 0, 1, loaded)
+    shutil.rmtree(path)
+    edges = len(loaded.indices)
+    print_table([['load', 1e3 * t_load, ''], ['first problem', 1e3 * t_first, peak / edges],
+                 ['second problem', 1e3 * t_second, '']],
+                header=['{} edges'.format(edges), 'ms', 'bytes/edge'], numfmt='{:.3g}')
+
+
+def benchmark_vectorized_bfs(n=2000, min_links=4, seed=0):
+    """Time one-to-all breadth-first search from node 0 of a RandomGraph, by
+    breadth_first_array_search on a CompiledGraphProblem (with no goal) and
+    by vectorized_bfs."""
+    compiled = road_graph(n, min_links, seed).compile()
+    _, t_array = timed(breadth_first_array_search, CompiledGraphProblem(0, None, compiled))
+    _, t_vector = timed(vectorized_bfs, compiled, 0)
+    print_table([['breadth_first_array_search', 1e3 * t_array], ['vectorized_bfs', 1e3 * t_vector]],
+                header=['searcher', 'ms'], numfmt='{:.3f}')
+
+
+def benchmark_astar(sizes=(2000, 20000), queries=50, min_links=4, seed=0):
+    """Compare uniform_cost_search with astar_search (straight-line h) on
+    every pair of cities in romania_map and on random queries over
+    RandomGraphs, as GraphProblems and as CompiledGraphProblems. Report the
+    nodes expanded and the wall time per query; the time includes building
+    the heuristic table for each new goal."""
+    cases = [('romania', romania_map, list(itertools.product(romania_map.nodes(), repeat=2)))]
+    rng = random.Random(seed)
+    for n in sizes:
+        graph = road_graph(n, min_links, seed)
+        cases.append(('random {}'.format(n), graph, [(rng.randrange(n), rng.randrange(n)) for _ in range(queries)]))
+    rows = []
+    for name, graph, pairs in cases:
+        compiled = graph.compile()
+        for problem_class, g in ((GraphProblem, graph), (CompiledGraphProblem, compiled)):
+            for searcher in (uniform_cost_search, astar_search):
+                g.heuristic_tables.clear()
+                problems = [InstrumentedProblem(problem_class(a, b, g)) for a, b in pairs]
+                _, t = timed(lambda: [searcher(problem) for problem in problems])
+                expanded = sum(problem.succs for problem in problems)
+                rows.append([name, problem_class.__name__, searcher.__name__, expanded / len(pairs),
+                             1e3 * t / len(pairs)])
+    print_table(rows, header=['graph', 'problem', 'searcher', 'expanded/query', 'ms/query'], numfmt='{:.4g}')
+
+
+def benchmark_landmarks(n=20000, queries=50, k=8, min_links=4, seed=0):
+    """Compare the nodes expanded and the time per query of
+    uniform_cost_search, A* with the straight-line h and A* with ALT
+    heuristics from Landmarks chosen by each strategy, on random queries
+    over a RandomGraph, whose links are longer than the straight line by the
+    curvature factor. Landmark preprocessing time is reported separately."""
+    graph = road_graph(n, min_links, seed)
+    rng = random.Random(seed)
+    pairs = [(rng.randrange(n), rng.randrange(n)) for _ in range(queries)]
+    searchers = [('uniform_cost_search', uniform_cost_search, 0), ('astar_search straight-line', astar_search, 0)]
+    for strategy in ('farthest', 'avoid'):
+        landmarks, t = timed(Landmarks, graph, k, strategy, seed)
+        searchers.append(('astar_search ALT ' + strategy, lambda p, lm=landmarks: astar_search(p, lm.h(p)), t))
+    rows = []
+    for name, searcher, t_pre in searchers:
+        problems = [InstrumentedProblem(GraphProblem(a, b, graph)) for a, b in pairs]
+        _, t = timed(lambda: [searcher(problem) for problem in problems])
+        rows.append([name, sum(problem.succs for problem in problems) / queries, 1e3 * t / queries, t_pre])
+    print_table(rows, header=['searcher', 'expanded/query', 'ms/query', 'preprocessing s'], numfmt='{:.4g}')
+
+
+def benchmark_contraction(n=20000, queries=200, min_links=4, seed=0, path='benchmark.ch'):
+    """Build, save and load a ContractionHierarchy of a RandomGraph, and time
+    random queries on it against astar_search and
+    bidirectional_uniform_cost_search on the same CompiledGraphProblems."""
+    compiled = road_graph(n, min_links, seed).compile()
+    hierarchy, t_build = timed(ContractionHierarchy.build, compiled)
+    _, t_save = timed(hierarchy.save, path)
+    hierarchy, t_load = timed(ContractionHierarchy.load, path)
+    shutil.rmtree(path)
+    print_table([['build', t_build], ['save', t_save], ['load', t_load]], header=['', 'seconds'], numfmt='{:.4g}')
+    rng = random.Random(seed)
+    problems = [CompiledGraphProblem(rng.randrange(n), rng.randrange(n), hierarchy.graph) for _ in range(queries)]
+    rows = []
+    for name, searcher in (('astar_search', astar_search),
+                           ('contraction_hierarchy_search', lambda p: contraction_hierarchy_search(p, hierarchy))):
+        _, t = timed(lambda: [searcher(problem) for problem in problems])
+        rows.append([name, 1e3 * t / queries])
+    print_table(rows, header=['searcher ({} shortcuts)'.format(len(hierarchy.shortcuts)), 'ms/query'],
+                numfmt='{:.3f}')
+
+
+def benchmark_tree_cache(n=20000, queries=200, min_links=4, seed=0):
+    """Time queries that all go to one goal on a RandomGraph, answered by
+    uniform_cost_search and by a ShortestPathTreeCache holding the tree to
+    the goal (whose one-off Dijkstra is timed separately)."""
+    graph = road_graph(n, min_links, seed)
+    rng = random.Random(seed)
+    goal = rng.randrange(n)
+    problems = [GraphProblem(rng.randrange(n), goal, graph) for _ in range(queries)]
+    trees = ShortestPathTreeCache(graph)
+    trees.compile()
+    _, t_tree = timed(trees.tree_to, goal)
+    _, t_ucs = timed(lambda: [uniform_cost_search(problem) for problem in problems])
+    _, t_walk = timed(lambda: [trees.solve(problem) for problem in problems])
+    print_table([['uniform_cost_search', 1e3 * t_ucs / queries], ['tree_to (once)', 1e3 * t_tree],
+                 ['ShortestPathTreeCache.solve', 1e3 * t_walk / queries]],
+                header=['', 'ms/query'], numfmt='{:.3f}')
+
+
+def benchmark_distance_matrix(n=20000, k=100, min_links=4, seed=0, pairs=50):
+    """Time a k x k distance_matrix on a RandomGraph, serially and with a
+    worker process per CPU, against the estimated time of k * k
+    uniform_cost_search queries (extrapolated from a sample of pairs)."""
+    compiled = road_graph(n, min_links, seed).compile()
+    rng = random.Random(seed)
+    sources, targets = rng.sample(range(n), k), rng.sample(range(n), k)
+    sample = [CompiledGraphProblem(rng.choice(sources), rng.choice(targets), compiled) for _ in range(pairs)]
+    _, t_ucs = timed(lambda: [uniform_cost_search(problem) for problem in sample])
+    _, t_serial = timed(distance_matrix, compiled, sources, targets)
+    processes = os.cpu_count() or 1
+    _, t_pool = timed(distance_matrix, compiled, sources, targets, False, processes)
+    print_table([['uniform_cost_search per pair (estimated)', t_ucs * k * k / pairs],
+                 ['distance_matrix', t_serial],
+                 ['distance_matrix, {} processes'.format(processes), t_pool]],
+                header=['{} x {} matrix'.format(k, k), 'seconds'], numfmt='{:.3g}')
+
+
+def benchmark_all_pairs(sizes=(250, 500, 1000), queries=200, min_links=4, seed=0):
+    """Time AllPairsTable.build by each method on RandomGraphs, and random
+    queries answered by all_pairs_search and by uniform_cost_search."""
+    rows = []
+    for n in sizes:
+        compiled = road_graph(n, min_links, seed).compile()
+        row = [n]
+        for method in ('floyd-warshall', 'dijkstra'):
+            table, t = timed(AllPairsTable.build, compiled, method)
+            row.append(t)
+        rng = random.Random(seed)
+        problems = [CompiledGraphProblem(rng.randrange(n), rng.randrange(n), compiled) for _ in range(queries)]
+        for searcher in (uniform_cost_search, lambda p: all_pairs_search(p, table)):
+            _, t = timed(lambda: [searcher(problem) for problem in problems])
+            row.append(1e3 * t / queries)
+        rows.append(row)
+    print_table(rows, header=['nodes', 'floyd-warshall s', 'dijkstra s', 'ucs ms/query', 'table ms/query'],
+                numfmt='{:.4g}')
+
+
+def benchmark_replanning(n=20000, changes=(1, 10, 100), rounds=10, min_links=4, seed=0):
+    """Lengthen k random links of a RandomGraph, one of them on the current
+    shortest path, and replan a fixed query with LifelongPlanningAStar and
+    with astar_search from scratch; report states expanded and wall time
+    per replan (for LPA*, making the changes and searching), which for
+    LPA* should grow with k rather than with the graph."""
+    graph = road_graph(n, min_links, seed)
+    rng = random.Random(seed)
+    links = [(a, b) for a in graph.nodes() for b in graph.get(a)]
+    problem = GraphProblem(rng.randrange(n), rng.randrange(n), graph)
+    planner = LifelongPlanningAStar(problem, problem.h)  # links only get longer, so h stays consistent
+    _, t = timed(planner.search)
+    rows = [['first search', planner.expanded, 1e3 * t, '', '']]
+    for k in changes:
+        expanded = t_lpa = t_astar = astar_expanded = 0
+        for _ in range(rounds):
+            path = planner.path()
+            i = rng.randrange(len(path) - 1)
+            batch = [(path[i], path[i + 1])] + rng.sample(links, k - 1)
+            changes = [(a, b, 2 * graph.get(a, b) + 1) for a, b in batch]
+            before = planner.expanded
+            _, t = timed(lambda: (planner.update(changes), planner.search()))
+            expanded, t_lpa = expanded + planner.expanded - before, t_lpa + t
+            instrumented = InstrumentedProblem(GraphProblem(problem.initial, problem.goal, graph))
+            _, t = timed(astar_search, instrumented)
+            astar_expanded, t_astar = astar_expanded + instrumented.succs, t_astar + t
+        rows.append(['{} changed links'.format(k), expanded / rounds, 1e3 * t_lpa / rounds,
+                     astar_expanded / rounds, 1e3 * t_astar / rounds])
+    print_table(rows, header=['replan after', 'LPA* expanded', 'LPA* ms', 'A* expanded', 'A* ms'],
+                numfmt='{:.5g}')
+
+
+def benchmark_k_shortest_paths(n=20000, k=10, queries=10, min_links=4, seed=0):
+    """Time k_shortest_paths on random queries over a RandomGraph, with the
+    tree to each goal built inside the timing, against one
+    uniform_cost_search and one astar_search for the same queries."""
+    graph = road_graph(n, min_links, seed)
+    rng = random.Random(seed)
+    problems = [GraphProblem(rng.randrange(n), rng.randrange(n), graph) for _ in range(queries)]
+    trees = ShortestPathTreeCache(graph)
+    trees.compile()
+    rows = []
+    for name, searcher in (('uniform_cost_search', uniform_cost_search), ('astar_search', astar_search),
+                           ('k_shortest_paths, k={}'.format(k), lambda p: k_shortest_paths(p, k, trees))):
+        _, t = timed(lambda: [searcher(problem) for problem in problems])
+        rows.append([name, 1e3 * t / queries])
+    print_table(rows, header=['searcher', 'ms/query'], numfmt='{:.1f}')
+
+
+def benchmark_goal_test(n=20000, depots=(10, 100, 1000, 5000), k=5, min_links=4, seed=0):
+    """Search a RandomGraph for the nearest of a growing number of depots,
+    with goal_test looking the state up in the compiled goal set and, as
+    before, scanning the goal list; then time multi_goal_search for the k
+    nearest depots."""
+    graph = road_graph(n, min_links, seed)
+    rng = random.Random(seed)
+    rows = []
+    for m in depots:
+        problem = GraphProblem(rng.randrange(n), rng.sample(range(n), m), graph)
+        scanning = GraphProblem(problem.initial, problem.goal, graph)
+        scanning.goals = None  # fall back to the linear scan of the goal list
+        _, t_set = timed(uniform_cost_search, problem)
+        _, t_scan = timed(uniform_cost_search, scanning)
+        _, t_multi = timed(multi_goal_search, problem, k)
+        rows.append([str(m), 1e3 * t_set, 1e3 * t_scan, 1e3 * t_multi])
+    print_table(rows, header=['depots', 'goal set ms', 'goal list ms', '{} nearest ms'.format(k)],
+                numfmt='{:.1f}')
+
+
+# ______________________________________________________________________________
+# Graph generation
+
+
+def benchmark_random_graph(sizes=(10 ** 3, 10 ** 4, 10 ** 5), min_links=2):
+    """Time RandomGraph on growing node counts, with the rectangle grown to
+    keep the density of cities constant."""
+    rows = []
+    for n in sizes:
+        graph, t = timed(road_graph, n, min_links)
+        rows.append([n, graph.edge_count, t])
+    print_table(rows, header=['nodes', 'links', 'seconds'], numfmt='{:.7g}')
+
+
+# ______________________________________________________________________________
+# Loading road networks
+
+
+def write_dimacs(graph, path):
+    """Write a directed Graph with integer nodes 1..n to a DIMACS .gr file."""
+    with open(path, 'w') as f:
+        f.write('p sp {} {}\n'.format(len(graph.nodes()), graph.edge_count))
+        for a in graph.nodes():
+            for b, dist in graph.get(a).items():
+                f.write('a {} {} {}\n'.format(a, b, dist))
+
+
+def benchmark_load_dimacs(n=10 ** 5, min_links=2, path='benchmark.gr'):
+    """Write a RandomGraph as a DIMACS file, then load it back as a Graph
+    and as a CompiledGraph; report wall time and peak bytes allocated per arc."""
+    graph = road_graph(n, min_links, first=1)
+    directed = Graph(directed=True)
+    for a in graph.nodes():
+        for b, dist in graph.get(a).items():
+            directed.connect1(a, b, dist)
+    write_dimacs(directed, path)
+    rows = []
+    for compiled in (False, True):
+        tracemalloc.start()
+        load_dimacs(path, compiled=compiled)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        _, t = timed(load_dimacs, path, compiled=compiled)
+        rows.append(['CompiledGraph' if compiled else 'Graph', t, peak / directed.edge_count])
+    os.remove(path)
+    print_table(rows, header=['result', 'seconds', 'peak bytes/arc'], numfmt='{:.3g}')
+
+
+if __name__ == '__main__':
+    benchmark_bfs_frontier()
+    benchmark_bidirectional()
+    benchmark_node()
+    benchmark_search_tree()
+    benchmark_compiled_graph()
+    benchmark_load_compiled()
+    benchmark_vectorized_bfs()
+    benchmark_astar()
+    benchmark_landmarks()
+    benchmark_contraction()
+    benchmark_tree_cache()
+    benchmark_distance_matrix()
+    benchmark_all_pairs()
+    benchmark_replanning()
+    benchmark_k_shortest_paths()
+    benchmark_goal_test()
+    benchmark_random_graph()
+    benchmark_load_dimacs()
@@ -0,0 +1,255 @@
+"""
+Contraction hierarchies
+
+Preprocess a static road map once, so that shortest-path queries on it visit
+only a few hundred nodes however big the map is. The nodes are contracted
+one at a time, least important first: contracting v removes it and adds a
+shortcut u -> w, of length d(u, v) + d(v, w), wherever u -> v -> w was the
+only shortest path between u and w. A query then searches from both ends
+upward only, toward more important nodes, and the shortcuts on the path it
+finds are unpacked back into the links they stand for:
+
+    from contraction import *
+    hierarchy = ContractionHierarchy.build(romania_map)
+    contraction_hierarchy_search(GraphProblem('Arad', 'Bucharest', romania_map), hierarchy)
+
+Building the hierarchy is slow in pure Python (half a minute for 2 * 10^4
+nodes); save it with hierarchy.save(path) and load it with
+ContractionHierarchy.load(path) instead of building it again.
+"""
+
+from engine import *
+
+
+class ContractionHierarchy:
+    """The contraction hierarchy of a CompiledGraph. rank[v] is the position
+    of node v in the contraction order. The upward graph holds, for each
+    node v, the links and shortcuts v -> w with rank[w] > rank[v], in CSR form
+    (up_indptr, up_indices, up_weights); the downward graph holds, for each
+    v, the links u -> v with rank[u] > rank[v] (down_indptr, down_indices,
+    down_weights). shortcuts is an array of (u, w, v) rows: the link u -> w
+    of the hierarchy is a shortcut for u -> v -> w. Make one with
+    ContractionHierarchy.build(graph) or ContractionHierarchy.load(path)."""
+
+    format_version = 1
+
+    def __init__(self, graph, rank, up, down, shortcuts):
+        self.graph = graph
+        self.rank = rank
+        self.up_indptr, self.up_indices, self.up_weights = up
+        self.down_indptr, self.down_indices, self.down_weights = down
+        self.shortcuts = shortcuts
+        self.middles = None
+        self.lists = None
+
+    @classmethod
+    def build(cls, graph, witness_limit=100):
+        """Contract a Graph or CompiledGraph. Nodes are taken in order of
+        edge difference (the shortcuts contracting the node would add, less
+        the links it would remove) plus the number of its neighbors already
+        contracted, kept up to date lazily: a node popped from the queue is
+        contracted only if its recomputed priority is still the lowest. A
+        shortcut is left out when a witness search, a Dijkstra that avoids the
+        node and settles at most witness_limit nodes, finds a path no longer
+        than it. Link lengths must not be negative."""
+        compiled = graph if isinstance(graph, CompiledGraph) else graph.compile()
+        n = len(compiled)
+        indptr, indices, weights = compiled.as_lists()
+        out = [{} for _ in range(n)]  # out[u][w]: length of link u -> w among uncontracted nodes
+        into = [{} for _ in range(n)]  # into[w][u]: the same length, indexed by w
+        for u in range(n):
+            for e in range(indptr[u], indptr[u + 1]):
+                w = indices[e]
+                if w != u and weights[e] < out[u].get(w, np.inf):
+                    out[u][w] = into[w][u] = weights[e]
+        middles = {}  # (u, w) -> v for the shortcut u -> v -> w
+        contracted_neighbors = [0] * n
+        rank = np.empty(n, dtype=np.int64)
+        up, down = [None] * n, [None] * n
+
+        def shortcuts(v):
+            """The shortcuts (u, w, length) that contracting v would need."""
+            needed = []
+            for u, d_uv in into[v].items():
+                lengths = {w: d_uv + d_vw for w, d_vw in out[v].items() if w != u}
+                if lengths:
+                    dist = witness_search(out, u, v, max(lengths.values()), witness_limit)
+                    needed.extend((u, w, d) for w, d in lengths.items() if dist.get(w, np.inf) > d)
+            return needed
+
+        def priority(v):
+            return len(shortcuts(v)) - len(into[v]) - len(out[v]) + contracted_neighbors[v]
+
+        queue = [(priority(v), v) for v in range(n)]
+        heapq.heapify(queue)
+        for r in range(n):
+            while True:
+                _, v = heapq.heappop(queue)
+                p = priority(v)
+                if not queue or p <= queue[0][0]:
+                    break
+                heapq.heappush(queue, (p, v))
+            rank[v] = r
+            up[v], down[v] = list(out[v].items()), list(into[v].items())
+            for u, w, d in shortcuts(v):
+                if d < out[u].get(w, np.inf):
+                    out[u][w] = into[w][u] = d
+                    middles[u, w] = v
+            for u in into[v]:
+                del out[u][v]
+                contracted_neighbors[u] += 1
+            for w in out[v]:
+                del into[w][v]
+                contracted_neighbors[w] += 1
+        shortcut_rows = np.array([(u, w, v) for (u, w), v in middles.items()], dtype=np.int64).reshape(-1, 3)
+        return cls(compiled, rank, csr_arrays(up), csr_arrays(down), shortcut_rows)
+
+    def as_lists(self):
+        """Return the upward and downward CSR arrays as Python lists, made
+        once, for queries that index them one element at a time."""
+        if self.lists is None:
+            self.lists = ((self.up_indptr.tolist(), self.up_indices.tolist(), self.up_weights.tolist()),
+                          (self.down_indptr.tolist(), self.down_indices.tolist(), self.down_weights.tolist()))
+        return self.lists
+
+    def query(self, source, target):
+        """Return the length of a shortest path from node id source to node
+        id target and the list of node ids on it, or (inf, None) if there is
+        none. Dijkstra runs forward in the upward graph from source and
+        backward in the downward graph from target, taking turns; a side
+        stops once its smallest key is no less than the best path found."""
+        graphs = self.as_lists()
+        dist, parent = ({source: 0.0}, {target: 0.0}), ({source: -1}, {target: -1})
+        frontiers = ([(0.0, source)], [(0.0, target)])
+        best, meet = (0.0, source) if source == target else (np.inf, None)
+        side = 0
+        while frontiers[0] or frontiers[1]:
+            if not frontiers[side]:
+                side = 1 - side
+            d, v = heapq.heappop(frontiers[side])
+            if d >= best:
+                frontiers[side].clear()
+                continue
+            if d > dist[side][v]:
+                continue  # stale entry
+            if d + dist[1 - side].get(v, np.inf) < best:
+                best, meet = d + dist[1 - side][v], v
+            indptr, indices, weights = graphs[side]
+            own_dist, own_parent = dist[side], parent[side]
+            for e in range(indptr[v], indptr[v + 1]):
+                w = indices[e]
+                if d + weights[e] < own_dist.get(w, np.inf):
+                    own_dist[w], own_parent[w] = d + weights[e], v
+                    heapq.heappush(frontiers[side], (d + weights[e], w))
+            side = 1 - side
+        if meet is None:
+            return np.inf, None
+        forward = [meet]
+        while parent[0][forward[-1]] >= 0:
+            forward.append(parent[0][forward[-1]])
+        forward.reverse()
+        backward = [meet]
+        while parent[1][backward[-1]] >= 0:
+            backward.append(parent[1][backward[-1]])
+        hops = forward + backward[1:]
+        path = [source]
+        for a, b in zip(hops, hops[1:]):
+            path.extend(self.unpack(a, b)[1:])
+        return best, path
+
+    def unpack(self, a, b):
+        """Return the node ids on the link or shortcut a -> b, a to b."""
+        if self.middles is None:
+            self.middles = {(u, w): v for u, w, v in self.shortcuts.tolist()}
+        path, stack = [a], [(a, b)]
+        while stack:
+            a, b = stack.pop()
+            v = self.middles.get((a, b))
+            if v is None:
+                path.append(b)
+            else:
+                stack.append((v, b))
+                stack.append((a, v))
+        return path
+
+    def save(self, path):
+        """Save the hierarchy in directory path as .npy files plus
+        format.json, like CompiledGraph.save, with the graph itself saved in
+        the subdirectory graph."""
+        self.graph.save(os.path.join(path, 'graph'))
+        arrays = dict(rank=self.rank, up_indptr=self.up_indptr, up_indices=self.up_indices,
+                      up_weights=self.up_weights, down_indptr=self.down_indptr,
+                      down_indices=self.down_indices, down_weights=self.down_weights,
+                      shortcuts=self.shortcuts)
+        for key, array in arrays.items():
+            np.save(os.path.join(path, key + '.npy'), np.asarray(array))
+        with open(os.path.join(path, 'format.json'), 'w') as f:
+            json.dump(dict(format='ContractionHierarchy', version=self.format_version, nodes=len(self.graph),
+                           shortcuts=len(self.shortcuts)), f)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Load a hierarchy saved with save, memory-mapping its arrays as
+        CompiledGraph.load does."""
+        with open(os.path.join(path, 'format.json')) as f:
+            header = json.load(f)
+        if header.get('format') != 'ContractionHierarchy' or header.get('version') != cls.format_version:
+            raise ValueError('{} is not a version {} ContractionHierarchy.'.format(path, cls.format_version))
+
+        def array(key):
+            return np.load(os.path.join(path, key + '.npy'), mmap_mode=mmap_mode)
+
+        graph = CompiledGraph.load(os.path.join(path, 'graph'), mmap_mode)
+        return cls(graph, array('rank'), (array('up_indptr'), array('up_indices'), array('up_weights')),
+                   (array('down_indptr'), array('down_indices'), array('down_weights')), array('shortcuts'))
+
+
+def witness_search(out, source, avoid, limit, settle_limit):
+    """Dijkstra from source over the links in out, not passing through node
+    avoid, until the next node is farther than limit or settle_limit nodes
+    have been settled. Return the dict of tentative distances found."""
+    dist = {source: 0.0}
+    frontier = [(0.0, source)]
+    settled = 0
+    while frontier and settled < settle_limit:
+        d, v = heapq.heappop(frontier)
+        if d > limit:
+            break
+        if d > dist[v]:
+            continue  # stale entry
+        settled += 1
+        for w, length in out[v].items():
+            if w != avoid and d + length < dist.get(w, np.inf):
+                dist[w] = d + length
+                heapq.heappush(frontier, (d + length, w))
+    return dist
+
+
+def csr_arrays(links):
+    """Turn a list of lists of (node, length) pairs, one per node, into the
+    CSR arrays indptr, indices and weights."""
+    indptr = np.zeros(len(links) + 1, dtype=np.int64)
+    np.cumsum([len(pairs) for pairs in links], out=indptr[1:])
+    pairs = [pair for node_links in links for pair in node_links]
+    indices = np.array([w for w, _ in pairs], dtype=np.int64)
+    weights = np.array([d for _, d in pairs], dtype=np.float64)
+    return indptr, indices, weights
+
+
+def contraction_hierarchy_search(problem, hierarchy):
+    """Solve a GraphProblem or CompiledGraphProblem with a
+    ContractionHierarchy of its graph, and return the goal Node, built as a
+    Node-by-Node search would have built it, or None."""
+    graph = hierarchy.graph
+    if isinstance(problem, CompiledGraphProblem):
+        source, target = problem.initial, problem.goal
+    else:
+        source, target = graph.ids.get(problem.initial), graph.ids.get(problem.goal)
+    if source is None or target is None:
+        return None
+    _, path = hierarchy.query(source, target)
+    if path is None:
+        return None
+    if isinstance(problem, CompiledGraphProblem):
+        return compiled_path_to_node(problem, path)
+    return path_to_node(problem, [graph.name(i) for i in path])
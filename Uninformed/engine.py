@@ -0,0 +1,1237 @@
+"""
+Uninformed search engine (Chapter 3)
+
+The search algorithms from UninformedSearch.ipynb as an importable module.
+Every algorithm here is a specialization of tree_search or graph_search with
+a particular frontier, so they can be run and benchmarked without Jupyter,
+matplotlib, networkx or ipywidgets:
+
+    from engine import *
+    breadth_first_graph_search(GraphProblem('Arad', 'Bucharest', romania_map))
+"""
+
+from array import array
+from collections import OrderedDict
+
+from search import *
+
+
+# ______________________________________________________________________________
+# Generic search cores
+
+
+def tree_search(problem, frontier):
+    """Search through the successors of a problem to find a goal.
+    The argument frontier should be an empty queue.
+    Don't worry about repeated paths to a state. [Figure 3.7]"""
+    frontier.append(Node(problem.initial))
+    while frontier:
+        node = frontier.pop()
+        if problem.goal_test(node.state):
+            return node
+        frontier.extend(node.expand(problem))
+    return None
+
+
+def graph_search(problem, frontier, early_goal_test=False, display=False):
+    """Search through the successors of a problem to find a goal.
+    The argument frontier should be an empty queue.
+    If two paths reach a state, only use the first one. [Figure 3.7]
+    With early_goal_test, children are goal-tested when they are generated
+    rather than when they are expanded, which is what breadth-first search
+    wants. If the frontier is a PriorityQueue, a child whose state is already
+    in the frontier replaces the old entry when its f value is lower."""
+    node = Node(problem.initial)
+    if early_goal_test and problem.goal_test(node.state):
+        return node
+    frontier.append(node)
+    explored = set()
+    while frontier:
+        node = frontier.pop()
+        if not early_goal_test and problem.goal_test(node.state):
+            if display:
+                print(len(explored), "paths have been expanded and", len(frontier), "paths remain in the frontier")
+            return node
+        explored.add(node.state)
+        for child in node.expand(problem):
+            if child.state not in explored and child not in frontier:
+                if early_goal_test and problem.goal_test(child.state):
+                    return child
+                frontier.append(child)
+            elif isinstance(frontier, PriorityQueue) and child in frontier:
+                if frontier.f(child) < frontier[child]:
+                    del frontier[child]
+                    frontier.append(child)
+    return None
+
+
+# ______________________________________________________________________________
+# Named algorithms
+
+
+def breadth_first_tree_search(problem):
+    """Search the shallowest nodes in the search tree first.
+    Repeats infinitely in case of loops."""
+    return tree_search(problem, FIFOQueue())
+
+
+def depth_first_tree_search(problem):
+    """Search the deepest nodes in the search tree first.
+    Repeats infinitely in case of loops."""
+    return tree_search(problem, Stack())
+
+
+def breadth_first_graph_search(problem):
+    """[Figure 3.11]
+    Goal test before append to the frontier. Complexity is reduced to O(b^d).
+    The frontier is indexed by state, so each membership test is O(1)."""
+    return graph_search(problem, IndexedQueue(), early_goal_test=True)
+
+
+def depth_first_graph_search(problem):
+    """Search the deepest nodes in the search tree first.
+    Does not get trapped by loops.
+    If two paths reach a state, only use the first one."""
+    return graph_search(problem, IndexedQueue(lifo=True))
+
+
+def best_first_graph_search(problem, f, display=False):
+    """Search the nodes with the lowest f scores first.
+    You specify the function f(node) that you want to minimize; for example,
+    if f is the cost of the path from the root to the current node then we
+    have uniform cost search; if f is node.depth then we have breadth-first search.
+    There is a subtlety: the line "f = memoize(f, 'f')" means that the f
+    values will be cached on the nodes as they are computed. So after doing
+    a best first search you can examine the f values of the path returned."""
+    f = memoize(f, 'f')
+    return graph_search(problem, PriorityQueue('min', f), display=display)
+
+
+def uniform_cost_search(problem, display=False):
+    """[Figure 3.14]
+    Search the nodes with the lowest path cost first, Dijkstra-style: the
+    frontier is a plain heap of (path_cost, tie, node) entries, and instead
+    of removing a node when a cheaper path to its state is found, the cheaper
+    node is pushed and the stale entry is skipped when it is popped."""
+    node = Node(problem.initial)
+    frontier = [(node.path_cost, 0, node)]
+    best_cost = {node.state: node.path_cost}
+    explored = set()
+    tie = 1
+    while frontier:
+        cost, _, node = heapq.heappop(frontier)
+        if node.state in explored or cost > best_cost[node.state]:
+            continue  # stale entry
+        if problem.goal_test(node.state):
+            if display:
+                print(len(explored), "paths have been expanded and", len(frontier), "paths remain in the frontier")
+            return node
+        explored.add(node.state)
+        for child in node.expand(problem):
+            if child.state not in explored and child.path_cost < best_cost.get(child.state, np.inf):
+                best_cost[child.state] = child.path_cost
+                heapq.heappush(frontier, (child.path_cost, tie, child))
+                tie += 1
+    return None
+
+
+def astar_search(problem, h=None, display=False):
+    """A* search is best-first graph search with f(n) = g(n)+h(n).
+    You need to specify the h function when you call astar_search, or
+    else in your Problem subclass. The frontier is a heap, as in
+    uniform_cost_search, and a state is expanded again if a cheaper path to
+    it turns up, so the result is optimal for any admissible h. On a
+    GraphProblem, h looks its values up in the graph's heuristic table."""
+    h = h or problem.h
+    node = Node(problem.initial)
+    node.f = h(node)
+    frontier = [(node.f, 0, node)]
+    best_cost = {node.state: node.path_cost}
+    expanded = 0
+    tie = 1
+    while frontier:
+        _, _, node = heapq.heappop(frontier)
+        if node.path_cost > best_cost[node.state]:
+            continue  # stale entry
+        if problem.goal_test(node.state):
+            if display:
+                print(expanded, "paths have been expanded and", len(frontier), "paths remain in the frontier")
+            return node
+        expanded += 1
+        for child in node.expand(problem):
+            if child.path_cost < best_cost.get(child.state, np.inf):
+                best_cost[child.state] = child.path_cost
+                child.f = child.path_cost + h(child)
+                heapq.heappush(frontier, (child.f, tie, child))
+                tie += 1
+    return None
+
+
+def multi_goal_search(problem, k=None):
+    """Uniform cost search that goes on past the first goal: return the
+    Nodes of the goal states it reaches, each once, in order of path cost.
+    It stops after the first k of them, once every goal in a list goal has
+    been reached, or when the frontier is empty. For the three depots
+    nearest a city, give the list of depots as the goal and k=3, or
+    override goal_test; a single goal with Problem's own goal_test stops
+    the search at that goal."""
+    goal = problem.goal
+    wanted = np.inf if k is None else k
+    if isinstance(goal, list):
+        try:
+            wanted = min(wanted, len(set(goal)))
+        except TypeError:  # unhashable goal states
+            wanted = min(wanted, len(goal))
+    else:
+        inner = problem.problem if isinstance(problem, InstrumentedProblem) else problem
+        if type(inner).goal_test is Problem.goal_test:
+            wanted = min(wanted, 1)  # goal_test accepts only the one goal state
+    found = []
+    node = Node(problem.initial)
+    frontier = [(node.path_cost, 0, node)]
+    best_cost = {node.state: node.path_cost}
+    explored = set()
+    tie = 1
+    while frontier and len(found) < wanted:
+        cost, _, node = heapq.heappop(frontier)
+        if node.state in explored or cost > best_cost[node.state]:
+            continue  # stale entry
+        if problem.goal_test(node.state):
+            found.append(node)
+        explored.add(node.state)
+        for child in node.expand(problem):
+            if child.state not in explored and child.path_cost < best_cost.get(child.state, np.inf):
+                best_cost[child.state] = child.path_cost
+                heapq.heappush(frontier, (child.path_cost, tie, child))
+                tie += 1
+    return found
+
+
+def depth_limited_search(problem, limit=3, prune_cycles=False):
+    """[Figure 3.17]
+    Return a goal Node, 'cutoff' if the limit stopped the search, or None
+    if the whole tree was searched without finding a goal.
+    The search runs on an explicit stack, so limit is not bounded by Python's
+    recursion limit, and successors are generated one action at a time. With
+    prune_cycles, a child whose state is already on the current path is not
+    explored (path-based cycle checking), which keeps memory at O(limit)."""
+    return stack_depth_limited_search(problem, limit, [], prune_cycles)[0]
+
+
+def iterative_deepening_search(problem, generated=None, prune_cycles=False):
+    """[Figure 3.18]
+    Run depth-limited searches with limits 0, 1, 2, ... until one does not
+    report 'cutoff'. Each iteration runs on an explicit stack that is reused
+    from one limit to the next. If a list is passed as generated, the number
+    of nodes generated by each iteration is appended to it."""
+    stack = []
+    for depth in range(sys.maxsize):
+        result, n = stack_depth_limited_search(problem, depth, stack, prune_cycles)
+        if generated is not None:
+            generated.append(n)
+        if result != 'cutoff':
+            return result
+
+
+def stack_depth_limited_search(problem, limit, stack, prune_cycles=False):
+    """Depth-limited search on the given list as an explicit stack of
+    (node, actions) pairs, expanding each node one action at a time. With
+    prune_cycles, the states on the stack are also kept in a set, so the
+    on-path check for each child is O(1).
+    Return the depth_limited_search result and the number of nodes generated."""
+    root = Node(problem.initial)
+    if problem.goal_test(root.state):
+        return root, 1
+    if limit == 0:
+        return 'cutoff', 1
+    generated = 1
+    cutoff_occurred = False
+    on_path = {root.state} if prune_cycles else None
+    stack.clear()
+    stack.append((root, iter(problem.actions(root.state))))
+    while stack:
+        node, actions = stack[-1]
+        for action in actions:
+            break
+        else:
+            stack.pop()
+            if prune_cycles:
+                on_path.discard(node.state)
+            continue
+        child = node.child_node(problem, action)
+        generated += 1
+        if prune_cycles and child.state in on_path:
+            continue
+        if problem.goal_test(child.state):
+            stack.clear()
+            return child, generated
+        if len(stack) == limit:
+            cutoff_occurred = True
+        else:
+            stack.append((child, iter(problem.actions(child.state))))
+            if prune_cycles:
+                on_path.add(child.state)
+    return ('cutoff' if cutoff_occurred else None), generated
+
+
+# ______________________________________________________________________________
+# Array-backed search trees
+
+
+class SearchTree:
+    """A search tree kept as columns of machine numbers instead of one Node
+    object per generated node. Node i holds states[i], was reached from node
+    parent[i] (-1 for the root) by the action with id action[i], and has
+    path_cost[i] and depth[i]. Actions are interned to small integer ids, and
+    the states in the tree are also kept in a set, so (state in tree) is a
+    hash lookup. Nodes are only built, by node(i), when a solution path is
+    wanted."""
+
+    def __init__(self):
+        self.states, self.seen = [], set()
+        self.actions, self.action_ids = [], {}
+        self.parent = array('q')
+        self.action = array('i')
+        self.path_cost = array('d')
+        self.depth = array('i')
+
+    def add(self, state, parent=-1, action=None, path_cost=0):
+        """Add a node for state, derived from node parent by action, and
+        return its index."""
+        action_id = self.action_ids.get(action)
+        if action_id is None:
+            action_id = self.action_ids[action] = len(self.actions)
+            self.actions.append(action)
+        self.states.append(state)
+        self.seen.add(state)
+        self.parent.append(parent)
+        self.action.append(action_id)
+        self.path_cost.append(path_cost)
+        self.depth.append(self.depth[parent] + 1 if parent >= 0 else 0)
+        return len(self.states) - 1
+
+    def node(self, i):
+        """Build the Node for node i, with Nodes for its ancestors as parents."""
+        path = []
+        while i >= 0:
+            path.append(i)
+            i = self.parent[i]
+        node = None
+        for i in reversed(path):
+            node = Node(self.states[i], node, self.actions[self.action[i]], self.path_cost[i])
+        return node
+
+    def __len__(self):
+        return len(self.states)
+
+    def __contains__(self, state):
+        return state in self.seen
+
+
+def breadth_first_array_search(problem):
+    """breadth_first_graph_search with the search tree in a SearchTree.
+    Nodes are added in the order breadth-first search expands them, so the
+    frontier is just the range of tree indices not yet expanded, and the
+    tree's set of states doubles as the explored set and frontier index."""
+    tree = SearchTree()
+    tree.add(problem.initial)
+    if problem.goal_test(problem.initial):
+        return tree.node(0)
+    states, path_cost = tree.states, tree.path_cost
+    i = 0
+    while i < len(tree):
+        s = states[i]
+        for action in problem.actions(s):
+            child = problem.result(s, action)
+            if child not in tree:
+                j = tree.add(child, i, action, problem.path_cost(path_cost[i], s, action, child))
+                if problem.goal_test(child):
+                    return tree.node(j)
+        i += 1
+    return None
+
+
+# ______________________________________________________________________________
+# Bidirectional search on GraphProblems
+
+
+def path_to_node(problem, states):
+    """Turn a list of graph states, from problem.initial to the last state,
+    into the Node a search would have returned for it."""
+    node = Node(states[0])
+    for state in states[1:]:
+        node = node.child_node(problem, state)
+    return node
+
+
+def join_paths(problem, meet, forward_parents, backward_parents):
+    """Join the forward path to meet with the backward path from meet, where
+    forward_parents maps each state to its predecessor and backward_parents
+    maps each state to its successor on the way to the goal."""
+    states = [meet]
+    while forward_parents[states[-1]] is not None:
+        states.append(forward_parents[states[-1]])
+    states.reverse()
+    while backward_parents[states[-1]] is not None:
+        states.append(backward_parents[states[-1]])
+    return path_to_node(problem, states)
+
+
+def bidirectional_breadth_first_search(problem):
+    """Breadth-first search from problem.initial and from problem.goal at the
+    same time, one whole layer at a time from whichever side has the smaller
+    frontier, over problem.graph and its reverse. Returns the Node for a path
+    with the fewest links, or None. Expands about O(b^(d/2)) nodes."""
+    graph, reverse = problem.graph, problem.graph.reverse()
+    if problem.initial == problem.goal:
+        return Node(problem.initial)
+    forward = ({problem.initial: None}, [problem.initial], graph, {problem.initial: 0})
+    backward = ({problem.goal: None}, [problem.goal], reverse, {problem.goal: 0})
+    while forward[1] and backward[1]:
+        this, other = (forward, backward) if len(forward[1]) <= len(backward[1]) else (backward, forward)
+        parents, layer, links, depth = this
+        other_parents, _, _, other_depth = other
+        best, meet = np.inf, None
+        next_layer = []
+        for state in layer:
+            for child in links.get(state):
+                if child in parents:
+                    continue
+                parents[child] = state
+                depth[child] = depth[state] + 1
+                next_layer.append(child)
+                if child in other_parents and depth[child] + other_depth[child] < best:
+                    best, meet = depth[child] + other_depth[child], child
+        if meet is not None:
+            return join_paths(problem, meet, forward[0], backward[0])
+        this[1][:] = next_layer
+    return None
+
+
+def bidirectional_uniform_cost_search(problem):
+    """Uniform cost search from problem.initial over problem.graph and from
+    problem.goal over its reverse, always advancing the side whose frontier
+    has the lower cost. mu is the cost of the best path found through a state
+    reached from both sides; the search stops once the two frontier minimums
+    add up to at least mu, since no path through unsettled states can then be
+    cheaper. Link lengths must be non-negative numbers."""
+    graph, reverse = problem.graph, problem.graph.reverse()
+    if problem.initial == problem.goal:
+        return Node(problem.initial)
+    forward = ({problem.initial: None}, [(0, problem.initial)], graph, {problem.initial: 0}, set())
+    backward = ({problem.goal: None}, [(0, problem.goal)], reverse, {problem.goal: 0}, set())
+    mu, meet = np.inf, None
+    while forward[1] and backward[1]:
+        if forward[1][0][0] + backward[1][0][0] >= mu:
+            break
+        this, other = (forward, backward) if forward[1][0][0] <= backward[1][0][0] else (backward, forward)
+        parents, frontier, links, cost, settled = this
+        other_cost = other[3]
+        g, state = heapq.heappop(frontier)
+        if state in settled or g > cost[state]:
+            continue  # stale entry
+        settled.add(state)
+        for child, dist in links.get(state).items():
+            new_g = g + dist
+            if new_g < cost.get(child, np.inf):
+                cost[child] = new_g
+                parents[child] = state
+                heapq.heappush(frontier, (new_g, child))
+            if child in other_cost and cost[child] + other_cost[child] < mu:
+                mu, meet = cost[child] + other_cost[child], child
+    if meet is None:
+        return None
+    return join_paths(problem, meet, forward[0], backward[0])
+
+
+# ______________________________________________________________________________
+# Vectorized search on CompiledGraphs
+
+
+def vectorized_bfs(graph, source, goal=None):
+    """Breadth-first search of a CompiledGraph from the node named source,
+    one whole layer at a time with NumPy: gather the edges of the layer
+    through indptr, drop the ones to visited nodes and keep one edge per new
+    node with np.unique. Return arrays parent and depth, where depth[i] is the
+    number of links on a shortest path to node i and parent[i] is the node
+    before it (both -1 where unreached; parent is -1 for the source too).
+    If goal is given, stop after the layer that reaches it."""
+    n = len(graph)
+    parent = np.full(n, -1, dtype=np.int64)
+    depth = np.full(n, -1, dtype=np.int64)
+    visited = np.zeros(n, dtype=bool)
+    s = graph.ids[source]
+    g = graph.ids.get(goal, -1) if goal is not None else -1
+    depth[s], visited[s] = 0, True
+    layer, d = np.array([s], dtype=np.int64), 0
+    while layer.size and not (g >= 0 and visited[g]):
+        starts, counts = graph.indptr[layer], graph.indptr[layer + 1] - graph.indptr[layer]
+        total = counts.sum()
+        if total == 0:
+            break
+        # positions of all edges out of the layer: each start, then start + 1, ...
+        offsets = np.cumsum(counts) - counts
+        edges = np.repeat(starts - offsets, counts) + np.arange(total)
+        children, parents = graph.indices[edges], np.repeat(layer, counts)
+        new = ~visited[children]
+        children, first = np.unique(children[new], return_index=True)
+        d += 1
+        parent[children] = parents[new][first]
+        depth[children] = d
+        visited[children] = True
+        layer = children
+    return parent, depth
+
+
+def vectorized_breadth_first_search(problem, compiled=None):
+    """Solve a GraphProblem or CompiledGraphProblem with vectorized_bfs and
+    return the goal Node, built for the problem as a Node-by-Node search
+    would have built it, or None. For a GraphProblem, pass compiled (the
+    CompiledGraph of problem.graph) to avoid compiling it on every call."""
+    if isinstance(problem, CompiledGraphProblem):
+        compiled = problem.graph
+        source = compiled.name(problem.initial)
+        goal = compiled.name(problem.goal) if problem.goal is not None else None
+    else:
+        compiled = compiled or problem.graph.compile()
+        source, goal = problem.initial, problem.goal
+    parent, depth = vectorized_bfs(compiled, source, goal)
+    g = compiled.ids.get(goal)
+    if g is None or depth[g] < 0:
+        return None
+    path = [g]
+    while parent[path[-1]] >= 0:
+        path.append(int(parent[path[-1]]))
+    path.reverse()
+    if isinstance(problem, CompiledGraphProblem):
+        return compiled_path_to_node(problem, path)
+    return path_to_node(problem, [compiled.name(i) for i in path])
+
+
+def compiled_path_to_node(problem, path):
+    """Like path_to_node, for a CompiledGraphProblem, whose actions are edge
+    positions rather than the next state."""
+    node = Node(path[0])
+    for state in path[1:]:
+        edge = first(e for e in problem.actions(node.state) if problem.indices[e] == state)
+        node = node.child_node(problem, edge)
+    return node
+
+
+# ______________________________________________________________________________
+# Caching solutions to repeated GraphProblems
+
+
+class SolutionCache:
+    """A bounded LRU cache of search results for GraphProblems and
+    CompiledGraphProblems, keyed by the graph, initial state, goal,
+    algorithm and any extra arguments. Each result is stored with the
+    graph's version, and a result for an older version counts as a miss
+    (and an invalidation), so changing the graph with connect or connect1
+    invalidates it. Changes made to graph_dict directly are not noticed.
+    hits, misses, evictions and invalidations count what happened, to help
+    choose maxsize:
+        cache = SolutionCache(maxsize=1000)
+        cache.solve(GraphProblem('Arad', 'Bucharest', romania_map), uniform_cost_search)
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.results = OrderedDict()  # key -> (graph version, result), least recently used first
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def solve(self, problem, algorithm, *args):
+        """Return algorithm(problem, *args), from the cache if possible. A
+        list goal is keyed as a tuple; a CompiledGraph, which never changes,
+        counts as version 0."""
+        graph = problem.graph
+        goal = tuple(problem.goal) if isinstance(problem.goal, list) else problem.goal
+        key = (graph, problem.initial, goal, algorithm) + args
+        version = getattr(graph, 'version', 0)
+        entry = self.results.get(key)
+        if entry is not None:
+            if entry[0] == version:
+                self.hits += 1
+                self.results.move_to_end(key)
+                return entry[1]
+            self.invalidations += 1
+        self.misses += 1
+        result = algorithm(problem, *args)
+        self.results[key] = (version, result)
+        self.results.move_to_end(key)
+        if len(self.results) > self.maxsize:
+            self.results.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    def clear(self):
+        """Empty the cache; the counters are kept."""
+        self.results.clear()
+
+    def __len__(self):
+        return len(self.results)
+
+    def __repr__(self):
+        return '<SolutionCache {}/{}: {} hits, {} misses, {} evictions, {} invalidations>'.format(
+            len(self), self.maxsize, self.hits, self.misses, self.evictions, self.invalidations)
+
+
+# ______________________________________________________________________________
+# Shortest-path trees on CompiledGraphs
+
+
+def dijkstra(graph, source):
+    """One-to-all Dijkstra on a CompiledGraph from node id source. Return
+    arrays dist and parent: dist[i] is the length of a shortest path to
+    node i (inf if unreached) and parent[i] the node before it on that path
+    (-1 if unreached, and for the source)."""
+    dist, parent, _ = dijkstra_lists(graph, source)
+    return np.array(dist), np.array(parent, dtype=np.int64)
+
+
+def dijkstra_lists(graph, source, targets=None):
+    """dijkstra, with the results as lists, plus the list of the reached
+    nodes in the order they were settled (each after its parent). If a set
+    of node ids targets is given, stop once all of them are settled; the
+    distances to the other nodes are then only upper bounds."""
+    indptr, indices, weights = graph.as_lists()
+    n = len(graph)
+    dist, parent = [np.inf] * n, [-1] * n
+    settled = bytearray(n)
+    order = []
+    remaining = len(targets) if targets is not None else -1
+    dist[source] = 0.0
+    frontier = [(0.0, source)]
+    while frontier and remaining:
+        d, i = heapq.heappop(frontier)
+        if settled[i]:
+            continue  # stale entry
+        settled[i] = 1
+        order.append(i)
+        if targets is not None and i in targets:
+            remaining -= 1
+        for e in range(indptr[i], indptr[i + 1]):
+            j = indices[e]
+            if d + weights[e] < dist[j]:
+                dist[j], parent[j] = d + weights[e], i
+                heapq.heappush(frontier, (dist[j], j))
+    return dist, parent, order
+
+
+class ShortestPathTreeCache:
+    """Shortest-path trees of a Graph or CompiledGraph, from a source to
+    every node or from every node to a goal, kept so that queries sharing
+    an endpoint are answered by walking a tree rather than by a search:
+        trees = ShortestPathTreeCache(romania_map)
+        trees.tree_to('Bucharest')
+        trees.solve(GraphProblem('Arad', 'Bucharest', romania_map))
+    tree_from(source) runs Dijkstra on the compiled graph and tree_to(goal)
+    runs it on the reverse graph. Each tree is a pair of arrays (dist,
+    parent) over node ids: for a tree from a source, parent[i] is the node
+    before i on a shortest path; for a tree to a goal, it is the node after
+    i. Trees are evicted least recently used first once they take more than
+    maxbytes, and all of them are dropped when a Graph's version changes.
+    hits, misses and evictions count what happened, as in SolutionCache."""
+
+    def __init__(self, graph, maxbytes=64 * 2 ** 20):
+        self.graph = graph
+        self.maxbytes = maxbytes
+        self.compiled = graph if isinstance(graph, CompiledGraph) else None
+        self.version = getattr(graph, 'version', None)
+        self.trees = OrderedDict()  # ('from' or 'to', node id) -> (dist, parent), least recently used first
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def compile(self):
+        """Return the CompiledGraph the trees are over, compiling the graph
+        again (and dropping every tree) if it has changed."""
+        if self.compiled is None or getattr(self.graph, 'version', None) != self.version:
+            self.clear()
+            self.compiled = self.graph.compile()
+            self.version = self.graph.version
+        return self.compiled
+
+    def tree_from(self, source):
+        """Return (dist, parent) for the tree of shortest paths from the
+        node named source, computing it if it is not cached."""
+        return self.tree('from', self.compile().ids[source])
+
+    def tree_to(self, goal):
+        """Return (dist, parent) for the tree of shortest paths to the node
+        named goal, computing it if it is not cached."""
+        return self.tree('to', self.compile().ids[goal])
+
+    def tree(self, direction, i):
+        key = (direction, i)
+        if key in self.trees:
+            self.trees.move_to_end(key)
+            return self.trees[key]
+        compiled = self.compile()
+        tree = dijkstra(compiled if direction == 'from' else compiled.reverse(), i)
+        self.trees[key] = tree
+        self.nbytes += tree[0].nbytes + tree[1].nbytes
+        while self.nbytes > self.maxbytes and len(self.trees) > 1:
+            _, (dist, parent) = self.trees.popitem(last=False)
+            self.nbytes -= dist.nbytes + parent.nbytes
+            self.evictions += 1
+        return tree
+
+    def solve(self, problem, algorithm=uniform_cost_search, *args):
+        """Answer a GraphProblem, or a CompiledGraphProblem on the compiled
+        graph, by walking a cached tree from its initial state or to its
+        goal, and return the goal Node (or None if the goal is unreachable).
+        With neither tree cached, return algorithm(problem, *args)."""
+        compiled = self.compile()
+        on_ids = problem.graph is compiled
+        s = problem.initial if on_ids else compiled.ids.get(problem.initial)
+        t = problem.goal if on_ids else compiled.ids.get(problem.goal)
+        if ('from', s) in self.trees:
+            dist, parent = self.tree('from', s)
+            path = walk_tree(parent, t, dist)
+            path = path[::-1] if path is not None else None
+        elif ('to', t) in self.trees:
+            dist, parent = self.tree('to', t)
+            path = walk_tree(parent, s, dist)
+        else:
+            self.misses += 1
+            return algorithm(problem, *args)
+        self.hits += 1
+        if path is None:
+            return None
+        if on_ids:
+            return compiled_path_to_node(problem, path)
+        return path_to_node(problem, [compiled.name(i) for i in path])
+
+    def clear(self):
+        """Drop every tree; the counters are kept."""
+        self.trees.clear()
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self.trees)
+
+    def __repr__(self):
+        return '<ShortestPathTreeCache {} trees, {} bytes: {} hits, {} misses, {} evictions>'.format(
+            len(self), self.nbytes, self.hits, self.misses, self.evictions)
+
+
+def walk_tree(parent, i, dist):
+    """Follow parent pointers from node i to the root of a shortest-path
+    tree and return the nodes passed, i first; None if i is not in the tree."""
+    if i is None or np.isinf(dist[i]):
+        return None
+    path = [i]
+    while parent[path[-1]] >= 0:
+        path.append(int(parent[path[-1]]))
+    return path
+
+
+# ______________________________________________________________________________
+# k shortest paths
+
+
+def k_shortest_paths(problem, k, trees=None):
+    """Return goal Nodes for up to k shortest loopless paths of a
+    GraphProblem, shortest first, by Yen's algorithm. Each path found is
+    varied at each of its states (the spur): the links that earlier paths
+    took from there are banned, as are the states before it, and a spur
+    search finds the best way on to the goal; the candidates wait in a
+    priority queue. The spur searches are A* with the exact distance to the
+    goal in the unchanged graph as h, read from the shortest-path tree to
+    the goal, which trees (a ShortestPathTreeCache of problem.graph, to
+    share it between calls) holds. Where no banned link is in the way, that
+    h leads a spur search straight along the tree, so k paths cost little
+    more than k walks."""
+    graph, goal = problem.graph, problem.goal
+    if trees is None:
+        trees = ShortestPathTreeCache(graph)
+    compiled = trees.compile()
+    ids = compiled.ids
+    if k < 1 or problem.initial not in ids or goal not in ids:
+        return []
+    dist, parent = trees.tree_to(goal)
+    first = walk_tree(parent, ids[problem.initial], dist)
+    if first is None:
+        return []
+    paths = [[compiled.name(i) for i in first]]
+    candidates, seen = [], {tuple(paths[0])}
+    tie = 0
+    while len(paths) < k:
+        previous = paths[-1]
+        root_cost = 0
+        for j in range(len(previous) - 1):
+            root = previous[:j + 1]
+            banned_links = {(p[j], p[j + 1]) for p in paths if p[:j + 1] == root}
+            spur = spur_search(graph, previous[j], goal, dist, ids, set(root[:-1]), banned_links)
+            if spur is not None and tuple(root[:-1] + spur[1]) not in seen:
+                path = root[:-1] + spur[1]
+                seen.add(tuple(path))
+                heapq.heappush(candidates, (root_cost + spur[0], tie, path))
+                tie += 1
+            root_cost += graph.get(previous[j], previous[j + 1])
+        if not candidates:
+            break
+        paths.append(heapq.heappop(candidates)[2])
+    return [path_to_node(problem, path) for path in paths]
+
+
+def spur_search(graph, source, goal, to_goal, ids, banned_states, banned_links):
+    """A* from source to goal in a Graph without banned_states and
+    banned_links, with h(state) = to_goal[ids[state]]. Return the length and
+    the list of states of a shortest path, or None."""
+    best = {source: 0}
+    parent = {source: None}
+    frontier = [(to_goal[ids[source]], 0, source)]
+    while frontier:
+        _, d, state = heapq.heappop(frontier)
+        if d > best[state]:
+            continue  # stale entry
+        if state == goal:
+            path = [state]
+            while parent[path[-1]] is not None:
+                path.append(parent[path[-1]])
+            return d, path[::-1]
+        for child, length in graph.get(state).items():
+            if child in banned_states or (state, child) in banned_links:
+                continue
+            h = to_goal[ids[child]]
+            if d + length < best.get(child, np.inf) and h < np.inf:
+                best[child], parent[child] = d + length, state
+                heapq.heappush(frontier, (d + length + h, d + length, child))
+    return None
+
+
+# ______________________________________________________________________________
+# Many-to-many distances
+
+
+def distance_matrix(graph, sources, targets, predecessors=False, processes=None):
+    """Return the matrix of shortest-path lengths from each node named in
+    sources (rows) to each node named in targets (columns) of a Graph or
+    CompiledGraph, inf where there is no path. It takes one Dijkstra sweep
+    per source, which stops once every target is settled. With predecessors,
+    also return an array with a row per source of the parent of each node id
+    on the sweep's shortest-path tree, for walk_tree (-1 where unknown; a
+    sweep that stopped early leaves nodes beyond the targets out). With
+    processes, the sources are split among that many worker processes."""
+    compiled = graph if isinstance(graph, CompiledGraph) else graph.compile()
+    source_ids = [compiled.ids[s] for s in sources]
+    target_ids = [compiled.ids[t] for t in targets]
+    if not processes or processes < 2 or len(source_ids) < 2:
+        matrix, parents = dijkstra_sweeps(compiled, source_ids, target_ids, predecessors)
+    else:
+        from concurrent.futures import ProcessPoolExecutor  # slow to import; only pools need it
+        chunks = [source_ids[i::processes] for i in range(processes)]
+        shared = CompiledGraph(compiled.names, compiled.indptr, compiled.indices, compiled.weights,
+                               None, compiled.directed, compiled.ids)
+        with ProcessPoolExecutor(processes, initializer=set_worker_graph, initargs=(shared,)) as pool:
+            results = list(pool.map(worker_sweeps, chunks, [target_ids] * processes,
+                                    [predecessors] * processes))
+        matrix = np.empty((len(source_ids), len(target_ids)))
+        parents = np.empty((len(source_ids), len(compiled)), dtype=np.int64) if predecessors else None
+        for i, (rows, chunk_parents) in enumerate(results):
+            matrix[i::processes] = rows
+            if predecessors:
+                parents[i::processes] = chunk_parents
+    return (matrix, parents) if predecessors else matrix
+
+
+def dijkstra_sweeps(graph, source_ids, target_ids, predecessors):
+    """The rows of distance_matrix for source_ids, and the parent arrays if
+    predecessors, else None."""
+    matrix = np.empty((len(source_ids), len(target_ids)))
+    parents = np.empty((len(source_ids), len(graph)), dtype=np.int64) if predecessors else None
+    targets = set(target_ids)
+    for row, s in enumerate(source_ids):
+        dist, parent, _ = dijkstra_lists(graph, s, targets)
+        matrix[row] = [dist[t] for t in target_ids]
+        if predecessors:
+            parents[row] = parent
+    return matrix, parents
+
+
+# The CompiledGraph of a distance_matrix worker process
+worker_graph = None
+
+
+def set_worker_graph(graph):
+    global worker_graph
+    worker_graph = graph
+
+
+def worker_sweeps(source_ids, target_ids, predecessors):
+    return dijkstra_sweeps(worker_graph, source_ids, target_ids, predecessors)
+
+
+# ______________________________________________________________________________
+# All-pairs shortest paths
+
+
+class AllPairsTable:
+    """The length of a shortest path between every pair of nodes of a
+    CompiledGraph, as the n x n array dist, with the n x n array next_hop,
+    where next_hop[i, j] is the node after i on a shortest path from i to j
+    (-1 if there is none). Any query is then a walk of path length:
+        table = AllPairsTable.build(romania_map)
+        all_pairs_search(GraphProblem('Arad', 'Bucharest', romania_map), table)
+    The tables take 12 n^2 bytes, so this is for graphs of up to a few
+    thousand nodes. save and load work as for CompiledGraph, with the graph
+    in the subdirectory graph."""
+
+    format_version = 1
+
+    def __init__(self, graph, dist, next_hop):
+        self.graph = graph
+        self.dist = dist
+        self.next_hop = next_hop
+
+    @classmethod
+    def build(cls, graph, method='auto', block=32):
+        """Compute the tables for a Graph or CompiledGraph, by method
+        'floyd-warshall' or 'dijkstra' (one Dijkstra on the reverse graph to
+        each node, which fills a column of each table). 'auto' takes
+        Floyd-Warshall for graphs of at most 256 nodes or with more than
+        n^2 / 16 links, where its n^3 NumPy work is cheaper than n sweeps
+        in Python, and Dijkstra otherwise. Floyd-Warshall updates block rows
+        at a time, to keep its temporaries in cache."""
+        compiled = graph if isinstance(graph, CompiledGraph) else graph.compile()
+        n = len(compiled)
+        if method == 'auto':
+            method = 'floyd-warshall' if n <= 256 or len(compiled.indices) > n * n / 16 else 'dijkstra'
+        if method == 'floyd-warshall':
+            dist, next_hop = floyd_warshall(compiled, block)
+        elif method == 'dijkstra':
+            dist = np.empty((n, n))
+            next_hop = np.empty((n, n), dtype=np.int32)
+            for j in range(n):
+                dist[:, j], next_hop[:, j] = dijkstra(compiled.reverse(), j)
+                next_hop[j, j] = j
+        else:
+            raise ValueError('Unknown all-pairs method: {}'.format(method))
+        return cls(compiled, dist, next_hop)
+
+    def path(self, source, target):
+        """Return the list of node ids on a shortest path from node id
+        source to node id target, or None if there is no path."""
+        if np.isinf(self.dist[source, target]):
+            return None
+        path = [source]
+        while path[-1] != target:
+            path.append(int(self.next_hop[path[-1], target]))
+        return path
+
+    def save(self, path):
+        """Save the tables in directory path as .npy files plus format.json,
+        with the graph in the subdirectory graph."""
+        self.graph.save(os.path.join(path, 'graph'))
+        np.save(os.path.join(path, 'dist.npy'), np.asarray(self.dist))
+        np.save(os.path.join(path, 'next_hop.npy'), np.asarray(self.next_hop))
+        with open(os.path.join(path, 'format.json'), 'w') as f:
+            json.dump(dict(format='AllPairsTable', version=self.format_version, nodes=len(self.graph)), f)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Load tables saved with save, memory-mapping them, so that a query
+        reads only the rows it walks through."""
+        with open(os.path.join(path, 'format.json')) as f:
+            header = json.load(f)
+        if header.get('format') != 'AllPairsTable' or header.get('version') != cls.format_version:
+            raise ValueError('{} is not a version {} AllPairsTable.'.format(path, cls.format_version))
+        return cls(CompiledGraph.load(os.path.join(path, 'graph'), mmap_mode),
+                   np.load(os.path.join(path, 'dist.npy'), mmap_mode=mmap_mode),
+                   np.load(os.path.join(path, 'next_hop.npy'), mmap_mode=mmap_mode))
+
+
+def floyd_warshall(graph, block=32):
+    """Return the dist and next_hop tables of a CompiledGraph by the
+    Floyd-Warshall algorithm, vectorized over each block of rows: for each
+    intermediate node k, the rows i of the block take dist[i, k] + dist[k, j]
+    wherever that is shorter, and next_hop[i, k] with it."""
+    n = len(graph)
+    dist = np.full((n, n), np.inf)
+    np.fill_diagonal(dist, 0)
+    sources = np.repeat(np.arange(n), np.diff(graph.indptr))
+    np.minimum.at(dist, (sources, graph.indices), graph.weights)
+    next_hop = np.full((n, n), -1, dtype=np.int32)
+    next_hop[sources, graph.indices] = graph.indices
+    np.fill_diagonal(next_hop, np.arange(n))
+    for k in range(n):
+        row = dist[k]
+        for i in range(0, n, block):
+            rows = dist[i:i + block]
+            through = rows[:, k, None] + row
+            shorter = through < rows
+            if shorter.any():
+                rows[shorter] = through[shorter]
+                hops = next_hop[i:i + block]
+                hops[shorter] = np.broadcast_to(hops[:, k, None], shorter.shape)[shorter]
+    return dist, next_hop
+
+
+def all_pairs_search(problem, table):
+    """Solve a GraphProblem or CompiledGraphProblem by walking an
+    AllPairsTable of its graph; return the goal Node or None."""
+    graph = table.graph
+    if isinstance(problem, CompiledGraphProblem):
+        source, target = problem.initial, problem.goal
+    else:
+        source, target = graph.ids.get(problem.initial), graph.ids.get(problem.goal)
+    if source is None or target is None:
+        return None
+    path = table.path(source, target)
+    if path is None:
+        return None
+    if isinstance(problem, CompiledGraphProblem):
+        return compiled_path_to_node(problem, path)
+    return path_to_node(problem, [graph.name(i) for i in path])
+
+
+# ______________________________________________________________________________
+# Landmark (ALT) heuristics
+
+
+# The distance stored in Landmarks tables for an unreachable node
+unreachable = np.finfo(np.float32).max
+
+
+class Landmarks:
+    """ALT preprocessing (A*, Landmarks, Triangle inequality) of a Graph or
+    CompiledGraph. k landmark nodes are chosen, and a one-to-all Dijkstra
+    from each, and one on the reverse graph to each, gives the distances
+    d(L, v) and d(v, L) from and to every landmark L, kept as float32 tables
+    with a row per node (unreachable is stored as the largest float32 rather
+    than inf, so that the differences below stay numbers). By the triangle
+    inequality, for any nodes v and t
+        d(v, t) >= max over L of d(L, t) - d(L, v) and d(v, L) - d(t, L),
+    which landmarks.h(problem) turns into an admissible heuristic for A*:
+        landmarks = Landmarks(graph, k=8)
+        astar_search(problem, landmarks.h(problem))
+    Unlike the straight-line distance, this bound follows the link lengths,
+    so it stays tight when links are longer than the distance they span.
+    Landmarks are chosen by strategy 'farthest' (each the node farthest from
+    those chosen so far) or 'avoid' (Goldberg and Werneck: the leaf of the
+    biggest subtree of a random shortest-path tree that the landmarks so far
+    bound poorly)."""
+
+    def __init__(self, graph, k=8, strategy='farthest', seed=None):
+        if strategy not in ('farthest', 'avoid'):
+            raise ValueError('Unknown landmark strategy: {}'.format(strategy))
+        self.graph = graph if isinstance(graph, CompiledGraph) else graph.compile()
+        n = len(self.graph)
+        k = min(k, n)
+        rng = random.Random(seed)
+        self.landmarks = []
+        self.from_table = np.empty((n, k), dtype=np.float32)
+        self.to_table = self.from_table if not self.graph.directed else np.empty((n, k), dtype=np.float32)
+        for j in range(k):
+            if j == 0 or strategy == 'farthest':
+                landmark = self.farthest(rng.randrange(n), j)
+            else:
+                landmark = self.avoid(rng.randrange(n), j)
+            self.landmarks.append(landmark)
+            self.from_table[:, j] = np.fmin(dijkstra_lists(self.graph, landmark)[0], unreachable)
+            if self.to_table is not self.from_table:
+                self.to_table[:, j] = np.fmin(dijkstra_lists(self.graph.reverse(), landmark)[0], unreachable)
+        # float32 rounding can make a difference of two entries exceed the
+        # true bound by up to one unit in the last place of the largest one,
+        # which on a directed graph may be in either table
+        largest = 0.0
+        for table in (self.from_table, self.to_table):
+            finite = table[table < unreachable]
+            if finite.size:
+                largest = max(largest, float(finite.max()))
+        self.slack = float(np.spacing(np.float32(largest))) if largest else 0.0
+
+    def farthest(self, start, j):
+        """Return the node farthest from the first j landmarks, or, for the
+        first landmark, from node start. Unreached nodes count as farthest,
+        so that every component of the graph gets a landmark in turn."""
+        if j == 0:
+            dist = np.array(dijkstra_lists(self.graph, start)[0])
+            dist[np.isinf(dist)] = -1
+            return int(np.argmax(dist))
+        return int(np.argmax(self.from_table[:, :j].min(axis=1)))
+
+    def avoid(self, root, j):
+        """Return a landmark by the avoid strategy, with a shortest-path tree
+        from node root and the first j landmarks."""
+        dist, parent, order = dijkstra_lists(self.graph, root)
+        order = np.array(order)
+        dist = np.array(dist)[order]
+        # how badly the landmarks so far bound d(root, v), for each reached v
+        bound = np.maximum(self.from_table[order, :j] - self.from_table[root, :j],
+                           self.to_table[root, :j] - self.to_table[order, :j])
+        weight = dist - np.clip(bound.max(axis=1), 0, None)
+        size = dict(zip(order.tolist(), weight.tolist()))
+        has_landmark = set(self.landmarks)
+        children = {}
+        for v in reversed(order.tolist()):
+            p = parent[v]
+            if v in has_landmark:
+                size[v] = 0.0
+                has_landmark.add(p)
+            if p >= 0:
+                size[p] += size[v]
+                children.setdefault(p, []).append(v)
+        v = root
+        while True:
+            best = max(children[v], key=size.get) if v in children else None
+            if best is None or size[best] <= 0:
+                return v
+            v = best
+
+    def h(self, problem):
+        """Return the ALT heuristic function for problem, a GraphProblem on
+        the graph these landmarks were computed for (or a
+        CompiledGraphProblem on self.graph). It takes a Node or a state."""
+        named = problem.graph is not self.graph
+        ids = self.graph.ids
+        t = ids[problem.goal] if named else problem.goal
+        from_table, to_table, slack = self.from_table, self.to_table, self.slack
+        from_goal, to_goal = from_table[t], to_table[t]
+
+        def h(node):
+            state = node.state if isinstance(node, Node) else node
+            v = ids[state] if named else state
+            bound = float(np.maximum(from_goal - from_table[v], to_table[v] - to_goal).max())
+            return bound - slack if bound > slack else 0.0
+
+        return h
+
+
+# ______________________________________________________________________________
+# Incremental replanning
+
+
+class LifelongPlanningAStar:
+    """Lifelong Planning A* (Koenig, Likhachev and Furcy) for a GraphProblem
+    whose link lengths change. It keeps, between searches, g (the cost of
+    the best path found to each state) and rhs (the best cost offered by a
+    state's predecessors). A link change only makes the state at its end
+    inconsistent (g != rhs), and the next search repairs only the
+    inconsistent states and those whose costs depend on them, instead of
+    starting over:
+        planner = LifelongPlanningAStar(GraphProblem('Arad', 'Bucharest', romania_map))
+        planner.search()
+        planner.connect('Sibiu', 'Rimnicu', 200)
+        planner.search()
+    LPA* needs every link to cost more than nothing, so costs here are pairs
+    (path length, number of links), compared lexicographically: shortest
+    paths still win, and links of length 0 still count.
+    Make changes to the graph through connect, connect1 or update, which
+    pass them on to graph.connect and graph.connect1; changes made to the
+    graph in other ways are not seen. A length of inf removes a link. h must
+    be consistent for every set of lengths the graph will have, which this
+    class cannot check, so it is 0 unless given: pass h=problem.h only if
+    no link will be made shorter than the straight line between its ends.
+    expanded counts the states expanded by all searches so far."""
+
+    def __init__(self, problem, h=None):
+        self.problem = problem
+        self.graph = problem.graph
+        self.reverse_graph = self.graph.reverse()  # kept in step by graph.connect1
+        self.h = h if h is not None else lambda state: 0
+        self.g, self.rhs = {}, {problem.initial: (0, 0)}
+        self.queue = []  # heap of (key, tie, state); an entry is live only if its key is in self.keys
+        self.keys = {}
+        self.tie = 0
+        self.expanded = 0
+        self.push(problem.initial)
+
+    def key(self, state):
+        best = min(self.g.get(state, no_path), self.rhs.get(state, no_path))
+        return best[0] + self.h(state), best
+
+    def push(self, state):
+        key = self.key(state)
+        self.keys[state] = key
+        heapq.heappush(self.queue, (key, self.tie, state))
+        self.tie += 1
+
+    def top_key(self):
+        """The smallest key in the queue, dropping entries that are out of date."""
+        while self.queue:
+            key, _, state = self.queue[0]
+            if self.keys.get(state) == key:
+                return key
+            heapq.heappop(self.queue)
+        return np.inf, no_path
+
+    def via(self, p, state):
+        """The cost of state when reached from its predecessor p."""
+        length, links = self.g.get(p, no_path)
+        return length + self.graph.get(p, state), links + 1
+
+    def update_vertex(self, state):
+        """Recompute rhs of state from its predecessors, and queue it if it
+        is now inconsistent."""
+        if state != self.problem.initial:
+            g, best = self.g, no_path
+            for p, distance in self.reverse_graph.get(state).items():
+                length, links = g.get(p, no_path)
+                if (length + distance, links + 1) < best:
+                    best = length + distance, links + 1
+            self.rhs[state] = best
+        self.keys.pop(state, None)
+        if self.g.get(state, no_path) != self.rhs[state]:
+            self.push(state)
+
+    def search(self):
+        """Bring g up to date for the goal and return the goal Node, built
+        as a Node-by-Node search would have built it, or None if the goal
+        cannot be reached."""
+        goal = self.problem.goal
+        g, rhs = self.g, self.rhs
+        while self.top_key() < self.key(goal) or g.get(goal, no_path) != rhs.get(goal, no_path):
+            _, _, state = heapq.heappop(self.queue)
+            del self.keys[state]
+            self.expanded += 1
+            if g.get(state, no_path) > rhs[state]:
+                g[state] = rhs[state]
+            else:
+                g[state] = no_path
+                self.update_vertex(state)
+            for child in self.graph.get(state):
+                self.update_vertex(child)
+        if np.isinf(g.get(goal, no_path)[0]):
+            return None
+        return path_to_node(self.problem, self.path())
+
+    def path(self):
+        """The states on a shortest path, found by walking back from the
+        goal through the predecessors p that minimize g[p] + cost(p, state).
+        Raise ValueError if the walk comes back to a state, as it can when
+        h was not consistent."""
+        states = [self.problem.goal]
+        seen = {self.problem.goal}
+        while states[-1] != self.problem.initial:
+            state = states[-1]
+            p = min(self.reverse_graph.get(state), key=lambda p: self.via(p, state))
+            if p in seen:
+                raise ValueError('The path to {} loops back to {}; is h consistent?'.format(state, p))
+            seen.add(p)
+            states.append(p)
+        states.reverse()
+        return states
+
+    def connect1(self, A, B, distance):
+        """Set the length of the link from A to B, and note the change."""
+        self.graph.connect1(A, B, distance)
+        self.update_vertex(B)
+
+    def connect(self, A, B, distance):
+        """Set the length of the link from A to B, and from B to A if the
+        graph is undirected, and note the change."""
+        self.graph.connect(A, B, distance)
+        self.update_vertex(B)
+        if not self.graph.directed:
+            self.update_vertex(A)
+
+    def update(self, changes):
+        """connect each (A, B, distance) in changes."""
+        for A, B, distance in changes:
+            self.connect(A, B, distance)
+
+
+# The LifelongPlanningAStar cost of a state with no known path
+no_path = (np.inf, np.inf)
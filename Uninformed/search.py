@@ -6,8 +6,14 @@ then create problem instances and solve them with calls to the various search
 functions.
 """
 
+import json
+import numbers
+import os
 import sys
+from array import array
 from collections import deque
+from itertools import islice
+from types import MappingProxyType
 
 from utils import *
 
@@ -18,13 +24,31 @@ class Problem:
     __init__, goal_test, and path_cost. Then you will create instances
     of your subclass and solve them with the various search functions."""
 
+    goals = None  # the goal states as a set, if goal is a list of hashable states
+
     def __init__(self, initial, goal=None):
         """The constructor specifies the initial state, and possibly a goal
-        state, if there is a unique goal. Your subclass's constructor can add
-        other arguments."""
+        state, if there is a unique goal, or a list of goal states. Your
+        subclass's constructor can add other arguments."""
         self.initial = initial
         self.goal = goal
 
+    @property
+    def goal(self):
+        return self._goal
+
+    @goal.setter
+    def goal(self, goal):
+        """Setting a list of goal states also makes the set self.goals, so
+        that goal_test is one hash lookup however many goals there are."""
+        self._goal = goal
+        self.goals = None
+        if isinstance(goal, list):
+            try:
+                self.goals = frozenset(goal)
+            except TypeError:  # unhashable states; goal_test falls back to is_in
+                pass
+
     def actions(self, state):
         """Return the actions that can be executed in the given
         state. The result would typically be a list, but if there are
@@ -40,13 +64,16 @@ class Problem:
 
     def goal_test(self, state):
         """Return True if the state is a goal. The default method compares the
-        state to self.goal or checks for state in self.goal if it is a
-        list, as specified in the constructor. Override this method if
+        state to self.goal or checks for state in self.goals if self.goal is
+        a list, as specified in the constructor. Override this method if
         checking against a single self.goal is not enough."""
-        if isinstance(self.goal, list):
-            return is_in(state, self.goal)
-        else:
-            return state == self.goal
+        goals = self.goals
+        if goals is not None:
+            return state in goals
+        goal = self._goal
+        if isinstance(goal, list):
+            return is_in(state, goal)
+        return state == goal
 
     def path_cost(self, c, state1, action, state2):
         """Return the cost of a solution path that arrives at state2 from
@@ -75,15 +102,29 @@ class Node:
     an explanation of how the f and h values are handled. You will not need to
     subclass this class."""
 
+    # Nodes are created by the million, so they have no __dict__. The hash of
+    # the state is computed once, depth is derived from the parent chain when
+    # asked for, and f is a slot for memoize(f, 'f') to keep an f or h value.
+    __slots__ = ('state', 'parent', 'action', 'path_cost', 'hash', 'f')
+
     def __init__(self, state, parent=None, action=None, path_cost=0):
         """Create a search tree Node, derived from a parent by an action."""
         self.state = state
         self.parent = parent
         self.action = action
         self.path_cost = path_cost
-        self.depth = 0
-        if parent:
-            self.depth = parent.depth + 1
+        try:
+            self.hash = hash(state)
+        except TypeError:  # such nodes just can't be put in sets or dicts
+            self.hash = None
+
+    @property
+    def depth(self):
+        """The number of actions from the root to this node."""
+        depth, node = 0, self.parent
+        while node is not None:
+            depth, node = depth + 1, node.parent
+        return depth
 
     def __repr__(self):
         return "<Node {}>".format(self.state)
@@ -120,14 +161,14 @@ class Node:
     # want in other contexts.]
 
     def __eq__(self, other):
-        return isinstance(other, Node) and self.state == other.state
+        return isinstance(other, Node) and self.hash == other.hash and self.state == other.state
 
     def __hash__(self):
         # We use the hash value of the state
         # stored in the node instead of the node
         # object itself to quickly search a node
         # with the same state in a Hash Table
-        return hash(self.state)
+        return self.hash
 
 
 # ______________________________________________________________________________
@@ -291,11 +332,35 @@ class Graph:
     inverse link is also added. You can use g.nodes() to get a list of nodes,
     g.get('A') to get a dict of links out of A, and g.get('A', 'B') to get the
     length of the link from A to B. 'Lengths' can actually be any object at
-    all, and nodes can be any hashable object."""
+    all, and nodes can be any hashable object. g.version counts the changes
+    made through connect and connect1, so caches of search results can tell
+    when they are out of date.
+    The graph also keeps an index of its nodes, the number of links
+    (g.edge_count), the number of links out of each node (g.degree('A')) and
+    its shortest and longest numeric link lengths (g.min_edge(), g.max_edge()),
+    which connect1 keeps up to date. Changes made to graph_dict directly
+    bypass the index. If the graph has g.locations, g.heuristic_table(goal)
+    gives the straight-line distance from every located node to goal.
+    g.freeze() makes the graph read-only, so that it can be shared between
+    threads without locks."""
 
     def __init__(self, graph_dict=None, directed=True):
         self.graph_dict = graph_dict or {}
         self.directed = directed
+        self.reversed_graph = None
+        self.version = 0
+        self.frozen = False
+        self.node_set, self.node_list = set(), []
+        self.degrees = {}
+        self.edge_count = 0
+        self.weight_counts = {}  # numeric link length -> number of links with it
+        self.weight_range = (np.inf, -np.inf)  # (min, max) of weight_counts, or None if stale
+        self.location_arrays = None  # (locations, names, coordinate array) for heuristic_table
+        self.heuristic_tables = {}  # goal -> (locations, table)
+        for a, links in self.graph_dict.items():
+            self.index_node(a)
+            for b, dist in links.items():
+                self.index_link(a, b, dist)
         if not directed:
             self.make_undirected()
 
@@ -314,24 +379,166 @@ class Graph:
 
     def connect1(self, A, B, distance):
         """Add a link from A to B of given distance, in one direction only."""
-        self.graph_dict.setdefault(A, {})[B] = distance
+        if self.frozen:
+            raise TypeError('A frozen Graph cannot be changed.')
+        self.link(A, B, distance)
+        if self.reversed_graph is not None and self.reversed_graph is not self:
+            self.reversed_graph.link(B, A, distance)
+
+    def link(self, A, B, distance):
+        """connect1, without keeping the reverse graph up to date."""
+        links = self.graph_dict.setdefault(A, {})
+        if B in links:
+            self.unindex_weight(links[B])
+            self.edge_count -= 1
+            self.degrees[A] -= 1
+        links[B] = distance
+        self.index_node(A)
+        self.index_link(A, B, distance)
+        self.version += 1
+
+    def index_node(self, a):
+        if a not in self.node_set:
+            self.node_set.add(a)
+            self.node_list.append(a)
+
+    def index_link(self, A, B, distance):
+        self.index_node(B)
+        self.edge_count += 1
+        self.degrees[A] = self.degrees.get(A, 0) + 1
+        if isinstance(distance, numbers.Real):
+            self.weight_counts[distance] = self.weight_counts.get(distance, 0) + 1
+            if self.weight_range is not None:
+                lo, hi = self.weight_range
+                self.weight_range = (min(lo, distance), max(hi, distance))
+
+    def unindex_weight(self, distance):
+        if isinstance(distance, numbers.Real):
+            n = self.weight_counts[distance] - 1
+            if n:
+                self.weight_counts[distance] = n
+            else:
+                del self.weight_counts[distance]
+                if self.weight_range is not None and distance in self.weight_range:
+                    self.weight_range = None  # the last link of that length went
 
     def get(self, a, b=None):
         """Return a link distance or a dict of {node: distance} entries.
         .get(a,b) returns the distance or None;
-        .get(a) returns a dict of {node: distance} entries, possibly {}."""
-        links = self.graph_dict.setdefault(a, {})
+        .get(a) returns a dict of {node: distance} entries, possibly {}.
+        Looking up a node that is not in the graph does not add it; the {}
+        returned for it is read-only. Use connect to add links."""
+        links = self.graph_dict.get(a, no_links)
         if b is None:
             return links
         else:
             return links.get(b)
 
     def nodes(self):
-        """Return a list of nodes in the graph."""
-        s1 = set([k for k in self.graph_dict.keys()])
-        s2 = set([k2 for v in self.graph_dict.values() for k2, v2 in v.items()])
-        nodes = s1.union(s2)
-        return list(nodes)
+        """Return a list of nodes in the graph. The list is the graph's own
+        index, kept up to date by connect1, so do not change it."""
+        return self.node_list
+
+    def degree(self, a):
+        """Return the number of links out of node a."""
+        return self.degrees.get(a, 0)
+
+    def min_edge(self):
+        """Return the shortest numeric link length, or inf if there is none."""
+        return self.edge_range()[0]
+
+    def max_edge(self):
+        """Return the longest numeric link length, or -inf if there is none."""
+        return self.edge_range()[1]
+
+    def edge_range(self):
+        if self.weight_range is None:
+            self.weight_range = (min(self.weight_counts, default=np.inf),
+                                 max(self.weight_counts, default=-np.inf))
+        return self.weight_range
+
+    def reverse(self):
+        """Return a Graph with every link of this one reversed, for searching
+        backwards from a goal. It is built once, and connect and connect1
+        then change it along with this graph. An undirected graph is its own
+        reverse."""
+        if not self.directed:
+            return self
+        if self.reversed_graph is None:
+            reversed_graph = Graph()
+            for a, links in self.graph_dict.items():
+                for b, dist in links.items():
+                    reversed_graph.connect1(b, a, dist)
+            reversed_graph.reversed_graph = self
+            self.reversed_graph = reversed_graph
+        return self.reversed_graph
+
+    def heuristic_table(self, goal):
+        """Return a dict of the straight-line distance from each node in
+        self.locations to goal, truncated to an int. The distances are found
+        in one NumPy pass over the locations and kept for the last few goals
+        whose tables were made, so that h is a dict lookup; assigning a new
+        locations dict makes them be found again. The kept tables are never
+        changed in place, only replaced, so threads can share a frozen
+        graph."""
+        locations = self.locations
+        table = self.heuristic_tables.get(goal)
+        if table is not None and table[0] is locations:
+            return table[1]
+        arrays = self.location_arrays
+        if arrays is None or arrays[0] is not locations:
+            arrays = (locations, list(locations), np.array(list(locations.values()), dtype=np.float64))
+            self.location_arrays = arrays
+        _, names, coords = arrays
+        table = dict(zip(names, straight_line_distances(coords, locations[goal]).astype(np.int64).tolist()))
+        self.heuristic_tables = with_table(self.heuristic_tables, goal, (locations, table))
+        return table
+
+    def compile(self):
+        """Return a CompiledGraph: an array snapshot of the graph as it is
+        now, for searches over integer node ids."""
+        return CompiledGraph.from_graph(self)
+
+    def save(self, path):
+        """Compile the graph and save it in directory path; see
+        CompiledGraph.save. CompiledGraph.load(path) loads it back."""
+        self.compile().save(path)
+
+    def freeze(self):
+        """Make the graph read-only and return it. graph_dict and its dicts
+        of links are replaced by read-only views, connect and connect1 raise
+        TypeError, and the reverse graph is built now rather than on first
+        use, so that threads can share the graph without locks. Heuristic
+        tables are still added as goals are asked for, but by replacing the
+        dict that holds them rather than changing it."""
+        if not self.frozen:
+            reversed_graph = self.reverse()
+            self.graph_dict = MappingProxyType({a: MappingProxyType(links)
+                                                for a, links in self.graph_dict.items()})
+            self.frozen = True
+            reversed_graph.freeze()
+        return self
+
+
+# The links of a node that is not in a Graph
+no_links = MappingProxyType({})
+
+# The number of goals whose heuristic tables a graph keeps
+heuristic_tables_kept = 16
+
+
+def with_table(tables, goal, table):
+    """Return a copy of the dict tables with table added for goal, dropping
+    the tables added longest ago to keep at most heuristic_tables_kept. The
+    dict passed in is left alone, for threads that may be reading it."""
+    kept = [(g, t) for g, t in tables.items() if g != goal]
+    return dict(kept[max(0, len(kept) - heuristic_tables_kept + 1):] + [(goal, table)])
+
+
+def straight_line_distances(coords, point):
+    """Return the straight-line distances from each (x, y) row of the array
+    coords to point, truncated toward zero as int() would."""
+    return np.trunc(np.hypot(coords[:, 0] - point[0], coords[:, 1] - point[1]))
 
 
 def UndirectedGraph(graph_dict=None):
@@ -339,36 +546,368 @@ def UndirectedGraph(graph_dict=None):
     return Graph(graph_dict=graph_dict, directed=False)
 
 
+class CompiledGraph:
+    """A Graph in compressed sparse row (CSR) form. Nodes are numbered
+    0..n-1; names[i] is the original node and ids maps it back. The links
+    out of node i are the edges indptr[i] <= e < indptr[i + 1], where edge e
+    goes to node indices[e] and has length weights[e]. If the graph has
+    locations, locations[i] holds the (x, y) of node i (nan if unknown).
+    Make one with Graph.compile() or CompiledGraph.load(path). Link lengths
+    must be numbers. Later changes to the Graph are not seen; compile it
+    again. heuristic_table(goal) works as Graph.heuristic_table, but on node
+    ids."""
+
+    format_version = 1
+
+    def __init__(self, names, indptr, indices, weights, locations=None, directed=True, ids=None):
+        self.names = names
+        self.ids = ids if ids is not None else {name: i for i, name in enumerate(names)}
+        self.indptr, self.indices, self.weights = indptr, indices, weights
+        self.locations = locations
+        self.directed = directed
+        self.lists = None
+        self.reversed_graph = None
+        self.heuristic_tables = {}  # goal id -> list of distances
+
+    @classmethod
+    def from_graph(cls, graph):
+        """Compile a Graph."""
+        names = list(graph.graph_dict)
+        names += [n for n in graph.nodes() if n not in graph.graph_dict]
+        ids = {name: i for i, name in enumerate(names)}
+        indptr = np.zeros(len(names) + 1, dtype=np.int64)
+        indices, weights = [], []
+        for i, name in enumerate(names):
+            links = graph.get(name)
+            indptr[i + 1] = indptr[i] + len(links)
+            indices.extend(ids[b] for b in links)
+            weights.extend(links.values())
+        locations = getattr(graph, 'locations', None)
+        if locations:
+            locations = np.array([locations.get(name, (np.nan, np.nan)) for name in names], dtype=np.float64)
+        else:
+            locations = None
+        return cls(names, indptr, np.array(indices, dtype=np.int64), np.array(weights, dtype=np.float64),
+                   locations, graph.directed, ids)
+
+    def __len__(self):
+        return len(self.names)
+
+    def name(self, i):
+        """Return the name of node i as a plain Python object."""
+        name = self.names[i]
+        return name.item() if isinstance(name, np.generic) else name
+
+    def as_lists(self):
+        """Return indptr, indices and weights as Python lists, which are
+        faster than arrays to index one element at a time. They are made
+        once, in O(E) time, and shared by every CompiledGraphProblem on this
+        graph; a loaded graph's lists are not shared between processes."""
+        if self.lists is None:
+            self.lists = self.indptr.tolist(), self.indices.tolist(), self.weights.tolist()
+        return self.lists
+
+    def heuristic_table(self, goal):
+        """Return a list of the straight-line distance from each node to node
+        goal, truncated to an int; 0 for a node whose location is unknown.
+        Tables are kept as Graph.heuristic_table keeps them."""
+        table = self.heuristic_tables.get(goal)
+        if table is None:
+            table = np.nan_to_num(straight_line_distances(self.locations, self.locations[goal])).tolist()
+            self.heuristic_tables = with_table(self.heuristic_tables, goal, table)
+        return table
+
+    def neighbors(self, i):
+        """Return the array of node ids linked to from node i."""
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def reverse(self):
+        """Return the CompiledGraph with every link turned around, made on
+        first use and kept; an undirected graph is its own reverse."""
+        if self.reversed_graph is None:
+            if not self.directed:
+                self.reversed_graph = self
+            else:
+                n = len(self)
+                sources = np.repeat(np.arange(n), np.diff(self.indptr))
+                order = np.argsort(self.indices, kind='stable')
+                indptr = np.zeros(n + 1, dtype=np.int64)
+                np.cumsum(np.bincount(self.indices, minlength=n), out=indptr[1:])
+                reversed_graph = CompiledGraph(self.names, indptr, sources[order], self.weights[order],
+                                               self.locations, True, self.ids)
+                reversed_graph.reversed_graph = self
+                self.reversed_graph = reversed_graph
+        return self.reversed_graph
+
+    def save(self, path):
+        """Save the graph in directory path (created if need be) as .npy
+        files, one per array, plus format.json holding the format version
+        and whether the graph is directed. Node names must be all strings or
+        all integers. The names are stored with the permutation that sorts
+        them, so that load can look names up by binary search."""
+        names = [self.name(i) for i in range(len(self))]
+        if not (all(isinstance(name, str) for name in names) or
+                all(isinstance(name, int) and not isinstance(name, bool) for name in names)):
+            raise ValueError('Node names must be all strings or all integers to be saved.')
+        names = np.array(names)
+        os.makedirs(path, exist_ok=True)
+        arrays = dict(names=names, name_order=np.argsort(names, kind='stable'),
+                      indptr=self.indptr, indices=self.indices, weights=self.weights)
+        if self.locations is not None:
+            arrays['locations'] = self.locations
+        for key, array in arrays.items():
+            np.save(os.path.join(path, key + '.npy'), np.asarray(array))
+        with open(os.path.join(path, 'format.json'), 'w') as f:
+            json.dump(dict(format='CompiledGraph', version=self.format_version, directed=self.directed,
+                           nodes=len(self), edges=len(self.indices)), f)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Load a graph saved with save. The arrays are memory-mapped (with
+        np.load's mmap_mode, 'r' by default), so loading takes the same time
+        whatever the size of the graph, and processes that load the same
+        files share one copy of them in the page cache. Node names are looked
+        up in the sorted names rather than through a dict. The searches,
+        though, index Python lists made by as_lists, so the first
+        CompiledGraphProblem or dijkstra on a loaded graph takes O(E) time
+        and each process keeps its own copy of the lists (about 90 bytes
+        an edge); benchmark_load_compiled in benchmark.py measures it."""
+        with open(os.path.join(path, 'format.json')) as f:
+            header = json.load(f)
+        if header.get('format') != 'CompiledGraph' or header.get('version') != cls.format_version:
+            raise ValueError('{} is not a version {} CompiledGraph.'.format(path, cls.format_version))
+
+        def array(key):
+            return np.load(os.path.join(path, key + '.npy'), mmap_mode=mmap_mode)
+
+        names = array('names')
+        locations = array('locations') if os.path.exists(os.path.join(path, 'locations.npy')) else None
+        return cls(names, array('indptr'), array('indices'), array('weights'), locations,
+                   header['directed'], SortedNameIndex(names, array('name_order')))
+
+
+class SortedNameIndex:
+    """Maps node names to ids like a dict, by binary search in an array of
+    names, given the permutation order that sorts it."""
+
+    def __init__(self, names, order):
+        self.names, self.order = names, order
+
+    def get(self, name, default=None):
+        try:
+            i = np.searchsorted(self.names, name, sorter=self.order)
+        except (TypeError, ValueError):  # not a name of the right type
+            return default
+        if i < len(self.order) and self.names[self.order[i]] == name:
+            return int(self.order[i])
+        return default
+
+    def __getitem__(self, name):
+        i = self.get(name)
+        if i is None:
+            raise KeyError(name)
+        return i
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __len__(self):
+        return len(self.names)
+
+
 def RandomGraph(nodes=list(range(10)), min_links=2, width=400, height=300,
-                curvature=lambda: random.uniform(1.1, 1.5)):
+                curvature=None, seed=None):
     """Construct a random graph, with the specified nodes, and random links.
     The nodes are laid out randomly on a (width x height) rectangle.
     Then each node is connected to the min_links nearest neighbors.
     Because inverse links are added, some nodes will have more connections.
     The distance between nodes is the hypotenuse times curvature(),
-    where curvature() defaults to a random number between 1.1 and 1.5."""
+    where curvature() defaults to a random number between 1.1 and 1.5.
+    If seed is given, the layout and the default curvature come from a
+    random.Random(seed) of their own, so the graph is reproducible; otherwise
+    they come from the random module.
+    Nearest neighbors are found by bucketing the nodes into a uniform grid of
+    cells and searching the cells in rings around each node, so a graph with
+    a million nodes builds in seconds. Ties go to the node that comes first
+    in nodes."""
+    rng = random if seed is None else random.Random(seed)
+    if curvature is None:
+        curvature = lambda: rng.uniform(1.1, 1.5)
     g = UndirectedGraph()
     g.locations = {}
     # Build the cities
     for node in nodes:
-        g.locations[node] = (random.randrange(width), random.randrange(height))
+        g.locations[node] = (rng.randrange(width), rng.randrange(height))
+    if len(nodes) < 2:
+        return g
+    # Bucket them into cells holding about two cities each
+    points = [g.locations[node] for node in nodes]
+    cell = max(1.0, np.sqrt(2.0 * width * height / len(nodes)))
+    columns, rows = int(width // cell) + 1, int(height // cell) + 1
+    cells = {}
+    for i, (x, y) in enumerate(points):
+        cells.setdefault((int(x // cell), int(y // cell)), []).append(i)
+
+    rings = []  # rings[r] lists the (dx, dy) offsets of the cells r cells away
+
+    def nearest(i):
+        """Index of the closest city not linked to city i, or None."""
+        x, y = points[i]
+        cx, cy = int(x // cell), int(y // cell)
+        links = g.get(nodes[i])
+        best_d2, best = np.inf, None
+        for r in range(max(columns, rows)):
+            if r == len(rings):
+                rings.append([(dx, dy) for dx in range(-r, r + 1) for dy in range(-r, r + 1)
+                              if max(abs(dx), abs(dy)) == r])
+            for dx, dy in rings[r]:
+                for j in cells.get((cx + dx, cy + dy), ()):
+                    px, py = points[j]
+                    d2 = (px - x) ** 2 + (py - y) ** 2
+                    if (d2 < best_d2 or d2 == best_d2 and j < best) and j != i and nodes[j] not in links:
+                        best_d2, best = d2, j
+            # Cells beyond ring r are at least r * cell away from the city
+            if best_d2 < (r * cell) ** 2:
+                break
+        return best
+
     # Build roads from each city to at least min_links nearest neighbors.
-    for i in range(min_links):
-        for node in nodes:
-            if len(g.get(node)) < min_links:
-                here = g.locations[node]
-
-                def distance_to_node(n):
-                    if n is node or g.get(node, n):
-                        return np.inf
-                    return distance(g.locations[n], here)
-
-                neighbor = min(nodes, key=distance_to_node)
-                d = distance(g.locations[neighbor], here) * curvature()
-                g.connect(node, neighbor, int(d))
+    for _ in range(min_links):
+        for i, node in enumerate(nodes):
+            if g.degree(node) < min_links:
+                j = nearest(i)
+                if j is not None:
+                    d = distance(points[j], points[i]) * curvature()
+                    g.connect(node, nodes[j], int(d))
     return g
 
 
+# ______________________________________________________________________________
+# Loading road networks from files
+
+
+def read_chunks(path, chunk_size):
+    """Yield the lines of a text file in lists of at most chunk_size lines."""
+    with open(path) as f:
+        while True:
+            lines = list(islice(f, chunk_size))
+            if not lines:
+                return
+            yield lines
+
+
+def load_dimacs(gr_path, co_path=None, directed=True, compiled=False, chunk_size=1 << 16):
+    """Load a road network in the DIMACS shortest-path challenge format: arcs
+    'a u v length' from the .gr file gr_path and, if co_path is given, node
+    coordinates 'v id x y' from the .co file into locations. Nodes are named
+    by their DIMACS ids, 1..n. DIMACS road networks list each road in both
+    directions, hence directed=True.
+    The files are read chunk_size lines at a time and the arcs kept in NumPy
+    arrays, so memory stays near 24 bytes per arc beyond one chunk of text.
+    With compiled=True a CompiledGraph is built straight from those arrays,
+    and the nested dicts of a Graph are never made."""
+    n = 0
+    chunks = []
+    for lines in read_chunks(gr_path, chunk_size):
+        for line in lines:
+            if line.startswith('p'):
+                n = int(line.split()[2])
+        text = ''.join(line[1:] for line in lines if line.startswith('a'))
+        chunks.append(np.fromstring(text, dtype=np.int64, sep=' ').reshape(-1, 3))
+    arcs = np.concatenate(chunks) if chunks else np.zeros((0, 3), dtype=np.int64)
+    n = max(n, int(arcs[:, :2].max()) if len(arcs) else 0)
+    locations = None
+    if co_path is not None:
+        locations = np.full((n, 2), np.nan)
+        for lines in read_chunks(co_path, chunk_size):
+            text = ''.join(line[1:] for line in lines if line.startswith('v'))
+            coords = np.fromstring(text, dtype=np.float64, sep=' ').reshape(-1, 3)
+            if len(coords):
+                locations[coords[:, 0].astype(np.int64) - 1] = coords[:, 1:]
+    if compiled:
+        names = np.arange(1, n + 1)
+        return compile_arcs(names, SortedNameIndex(names, np.arange(n)), arcs[:, 0] - 1, arcs[:, 1] - 1,
+                            arcs[:, 2].astype(np.float64), locations, directed)
+    g = Graph(directed=directed)
+    for a, b, dist in arcs.tolist():
+        g.connect(a, b, dist)
+    if locations is not None:
+        g.locations = {i + 1: tuple(xy) for i, xy in enumerate(locations.tolist()) if not np.isnan(xy[0])}
+    return g
+
+
+def load_edge_list(path, locations_path=None, directed=False, compiled=False, delimiter=',',
+                   header=None, chunk_size=1 << 16):
+    """Load a graph from a text file with one link per line, 'A,B,length'
+    (the length defaults to 1 if missing). Lines that start with # are
+    skipped, and so is the first line if header is True. With header=None
+    the first line is taken for a header when its length is not a number;
+    a file of 'A,B' lines cannot show that, so give header=True for one
+    that starts 'src,dst'. A line with fewer than two fields raises
+    ValueError. If locations_path is given, its lines 'A,x,y' fill in
+    locations. Names that look like numbers become numbers, as with
+    num_or_str. Reading is done in chunks as in load_dimacs, and with
+    compiled=True a CompiledGraph is built without making a Graph."""
+    ids, names = {}, []
+    sources, targets, lengths = array('q'), array('q'), array('d')
+    g = None if compiled else Graph(directed=directed)
+    first_line = True
+    line_number = 0
+    for lines in read_chunks(path, chunk_size):
+        for line in lines:
+            line_number += 1
+            fields = line.strip().split(delimiter)
+            if not line.strip() or line.startswith('#'):
+                continue
+            if first_line:
+                first_line = False
+                if header or (header is None and len(fields) > 2 and not isnumber(num_or_str(fields[2]))):
+                    continue
+            if len(fields) < 2:
+                raise ValueError('{}, line {}: expected A{}B[{}length], got {!r}.'.format(
+                    path, line_number, delimiter, delimiter, line.strip()))
+            a, b = num_or_str(fields[0]), num_or_str(fields[1])
+            dist = num_or_str(fields[2]) if len(fields) > 2 else 1
+            if g is not None:
+                g.connect(a, b, dist)
+                continue
+            for name in (a, b):
+                if name not in ids:
+                    ids[name] = len(names)
+                    names.append(name)
+            sources.append(ids[a])
+            targets.append(ids[b])
+            lengths.append(dist)
+    locations = {}
+    if locations_path is not None:
+        for lines in read_chunks(locations_path, chunk_size):
+            for line in lines:
+                fields = line.strip().split(delimiter)
+                if len(fields) >= 3 and not line.startswith('#') and isnumber(num_or_str(fields[1])):
+                    locations[num_or_str(fields[0])] = (num_or_str(fields[1]), num_or_str(fields[2]))
+    if g is not None:
+        if locations:
+            g.locations = locations
+        return g
+    location_array = None
+    if locations:
+        location_array = np.array([locations.get(name, (np.nan, np.nan)) for name in names], dtype=np.float64)
+    return compile_arcs(names, ids, np.frombuffer(sources, dtype=np.int64), np.frombuffer(targets, dtype=np.int64),
+                        np.frombuffer(lengths, dtype=np.float64), location_array, directed)
+
+
+def compile_arcs(names, ids, sources, targets, lengths, locations, directed):
+    """Build a CompiledGraph from parallel arrays of arcs between node ids.
+    An undirected graph gets each arc in both directions."""
+    if not directed:
+        sources, targets = np.concatenate([sources, targets]), np.concatenate([targets, sources])
+        lengths = np.concatenate([lengths, lengths])
+    order = np.argsort(sources, kind='stable')
+    indptr = np.zeros(len(names) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=len(names)), out=indptr[1:])
+    return CompiledGraph(names, indptr, targets[order], lengths[order], locations, directed, ids)
+
+
 """ [Figure 3.2]
 Simplified road map of Romania
 """
@@ -472,21 +1011,15 @@ class GraphProblem(Problem):
 
     def find_min_edge(self):
         """Find minimum value of edges."""
-        m = np.inf
-        for d in self.graph.graph_dict.values():
-            local_min = min(d.values())
-            m = min(m, local_min)
-
-        return m
+        return self.graph.min_edge()
 
     def h(self, node):
-        """h function is straight-line distance from a node's state to goal."""
+        """h function is straight-line distance from a node's state to goal,
+        looked up in the graph's heuristic table for the goal."""
         locs = getattr(self.graph, 'locations', None)
         if locs:
-            if type(node) is str:
-                return int(distance(locs[node], locs[self.goal]))
-
-            return int(distance(locs[node.state], locs[self.goal]))
+            state = node.state if isinstance(node, Node) else node
+            return self.graph.heuristic_table(self._goal)[state]
         else:
             return np.inf
 
@@ -507,6 +1040,52 @@ class GraphProblemStochastic(GraphProblem):
         raise NotImplementedError
 
 
+class CompiledGraphProblem(Problem):
+    """A GraphProblem over a CompiledGraph. initial and goal (or a list of
+    goals) are given as node names, but states are node ids and actions
+    are edge positions, so expanding a node only indexes lists and
+    allocates nothing but the range of its edges. Use names(node) to map a
+    result back to names."""
+
+    def __init__(self, initial, goal, graph):
+        if isinstance(goal, list):
+            goal = [graph.ids[g] for g in goal if g in graph.ids]
+        else:
+            goal = graph.ids[goal] if goal in graph.ids else None
+        super().__init__(graph.ids[initial], goal)
+        self.graph = graph
+        self.indptr, self.indices, self.weights = graph.as_lists()
+        self.h_table = None  # found on the first call of h, for searches that use it
+
+    def actions(self, i):
+        """The actions at node i are the positions of its edges."""
+        return range(self.indptr[i], self.indptr[i + 1])
+
+    def result(self, state, e):
+        """Following edge e leads to the node at its end."""
+        return self.indices[e]
+
+    def path_cost(self, cost_so_far, A, e, B):
+        return cost_so_far + self.weights[e]
+
+    def h(self, node):
+        """h function is straight-line distance from a node's state to goal."""
+        if self.h_table is None:
+            graph = self.graph
+            if graph.locations is not None and self.goal is not None and self.goals is None:
+                self.h_table = graph.heuristic_table(self.goal)
+            else:
+                self.h_table = ()
+        if self.h_table:
+            return self.h_table[node if isinstance(node, int) else node.state]
+        else:
+            return np.inf
+
+    def names(self, node):
+        """Return the names of the states on the path to node."""
+        return [self.graph.name(n.state) for n in node.path()]
+
+
 # ______________________________________________________________________________
 
 
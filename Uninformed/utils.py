@@ -714,20 +714,82 @@ class hashabledict(dict):
 
 
 # ______________________________________________________________________________
-# Queues: Stack, FIFOQueue, PriorityQueue
+# Queues: Stack, FIFOQueue, IndexedQueue, PriorityQueue
 # Stack and FIFOQueue are implemented as list and collection.deque
 # PriorityQueue is implemented here
 
 
+def Stack():
+    """Return an empty list, suitable as a Last-In-First-Out Queue."""
+    return []
+
+
+class FIFOQueue(collections.deque):
+    """A First-In-First-Out Queue: pop() returns the oldest item, so it can
+    be passed to tree_search and graph_search like any other frontier."""
+
+    def pop(self):
+        """Pop and return the oldest item."""
+        return self.popleft()
+
+
+class IndexedQueue:
+    """A FIFO (or, with lifo=True, LIFO) Queue that also keeps a hash index
+    of its items, so (item in queue) is O(1) instead of a scan of the queue.
+    Items that compare equal share one index entry; for search Nodes this
+    means the index is keyed by state."""
+
+    def __init__(self, items=(), lifo=False):
+        self.queue = collections.deque()
+        self.index = {}
+        self.lifo = lifo
+        self.extend(items)
+
+    def append(self, item):
+        """Add item to the back of the queue."""
+        self.queue.append(item)
+        self.index[item] = self.index.get(item, 0) + 1
+
+    def extend(self, items):
+        """Add each item in items to the back of the queue."""
+        for item in items:
+            self.append(item)
+
+    def pop(self):
+        """Pop and return the oldest item, or the newest one if lifo."""
+        item = self.queue.pop() if self.lifo else self.queue.popleft()
+        n = self.index[item]
+        if n == 1:
+            del self.index[item]
+        else:
+            self.index[item] = n - 1
+        return item
+
+    def __len__(self):
+        return len(self.queue)
+
+    def __iter__(self):
+        return iter(self.queue)
+
+    def __contains__(self, item):
+        return item in self.index
+
+
 class PriorityQueue:
     """A Queue in which the minimum (or maximum) element (as determined by f and
     order) is returned first.
     If order is 'min', the item with minimum f(x) is
     returned first; if order is 'max', then it is the item with maximum f(x).
-    Also supports dict-like lookup."""
+    Also supports dict-like lookup.
+    Heap entries are indexed by item, so (key in pq) and pq[key] are O(1) and
+    del pq[key] only marks the entry as removed; removed entries are skipped
+    by pop, which makes decrease-key (del, then append) O(log n). Items must
+    therefore be hashable."""
 
     def __init__(self, order='min', f=lambda x: x):
         self.heap = []
+        self.entries = {}  # item -> list of live [value, item, removed] heap entries, oldest first
+        self.size = 0
         if order == 'min':
             self.f = f
         elif order == 'max':  # now item with max f(x)
@@ -737,7 +799,10 @@ class PriorityQueue:
 
     def append(self, item):
         """Insert item at its correct position."""
-        heapq.heappush(self.heap, (self.f(item), item))
+        entry = [self.f(item), item, False]
+        self.entries.setdefault(item, []).append(entry)
+        heapq.heappush(self.heap, entry)
+        self.size += 1
 
     def extend(self, items):
         """Insert each item in items at its correct position."""
@@ -747,34 +812,50 @@ class PriorityQueue:
     def pop(self):
         """Pop and return the item (with min or max f(x) value)
         depending on the order."""
-        if self.heap:
-            return heapq.heappop(self.heap)[1]
+        while self.heap:
+            entry = heapq.heappop(self.heap)
+            if not entry[2]:
+                self._forget(entry)
+                return entry[1]
+        raise Exception('Trying to pop from empty PriorityQueue.')
+
+    def _forget(self, entry):
+        """Drop a live entry from the index."""
+        item = entry[1]
+        entries = self.entries[item]
+        if len(entries) == 1:
+            del self.entries[item]
         else:
-            raise Exception('Trying to pop from empty PriorityQueue.')
+            del entries[[e is entry for e in entries].index(True)]
+        self.size -= 1
 
     def __len__(self):
         """Return current capacity of PriorityQueue."""
-        return len(self.heap)
+        return self.size
 
     def __contains__(self, key):
         """Return True if the key is in PriorityQueue."""
-        return any([item == key for _, item in self.heap])
+        return key in self.entries
 
     def __getitem__(self, key):
         """Returns the first value associated with key in PriorityQueue.
         Raises KeyError if key is not present."""
-        for value, item in self.heap:
-            if item == key:
-                return value
-        raise KeyError(str(key) + " is not in the priority queue")
+        try:
+            return self.entries[key][0][0]
+        except KeyError:
+            raise KeyError(str(key) + " is not in the priority queue")
 
     def __delitem__(self, key):
         """Delete the first occurrence of key."""
         try:
-            del self.heap[[item == key for _, item in self.heap].index(True)]
-        except ValueError:
+            entry = self.entries[key][0]
+        except KeyError:
             raise KeyError(str(key) + " is not in the priority queue")
-        heapq.heapify(self.heap)
+        entry[2] = True
+        self._forget(entry)
+        if len(self.heap) > 2 * self.size + 32:  # mostly removed entries; compact
+            self.heap = [e for e in self.heap if not e[2]]
+            heapq.heapify(self.heap)
 
 
 # ______________________________________________________________________________